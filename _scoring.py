@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+路径评分的数值内核
+安装了 numba 时使用 njit 编译，否则退化为普通 Python 函数
+"""
+import numpy as np
+
+try:
+    from numba import njit  # type: ignore[import-not-found]
+except ImportError:  # 未安装 numba
+    def njit(*args, **kwargs):
+        """与 numba.njit 同签名的空装饰器"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def score_path(path_oil_codes: np.ndarray, path_caps: np.ndarray,
+               target_oil_code: int, quantity: float) -> float:
+    """
+    路径评分：无需清洗的管线 +100，需要清洗的管线 -80（编码 -1 表示管线无油品）
+    容量满足 +20，否则 -30；路径不经过管线时不受容量限制
+    """
+    s = 0.0
+    for i in range(path_oil_codes.shape[0]):
+        c = path_oil_codes[i]
+        if c == target_oil_code:
+            s += 100.0
+        elif c != -1:
+            s -= 80.0
+    if path_caps.shape[0] == 0 or quantity <= path_caps.min():
+        s += 20.0
+    else:
+        s -= 30.0
+    return s
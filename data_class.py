@@ -3,12 +3,55 @@
 批次管输调度系统 - 业务对象模型
 纯业务对象，不依赖 ORM 框架，包含业务逻辑。
 """
+import bisect
+import copy
 from datetime import datetime
-from typing import List, Dict, Optional
-from dataclasses import dataclass,field
+from typing import TYPE_CHECKING, List, Dict, Optional
+from dataclasses import dataclass, field, fields, InitVar
 
+# 油罐类型位标记
+TANK_SOURCE = 1
+TANK_TARGET = 2
+TANK_MIDDLE = 4
+TANK_TYPE_MASKS = {"SOURCE": TANK_SOURCE, "TARGET": TANK_TARGET, "MIDDLE": TANK_MIDDLE}
 
-@dataclass
+
+def _copy_slots(obj):
+    """逐字段浅拷贝 slots 数据类对象（不经过 __init__ / __post_init__）"""
+    cls = type(obj)
+    new = cls.__new__(cls)
+    for name in cls.__slots__:
+        setattr(new, name, getattr(obj, name))
+    return new
+
+
+def _slots_getstate(obj) -> tuple:
+    """pickle 状态：按 __slots__ 顺序的字段值元组"""
+    return tuple([getattr(obj, name) for name in type(obj).__slots__])
+
+
+def _slots_setstate(obj, state: tuple):
+    for name, value in zip(type(obj).__slots__, state):
+        setattr(obj, name, value)
+
+
+_ATOMIC_TYPES = (str, int, float, bool, type(None), datetime)  # 不可变叶子类型，深拷贝时直接引用
+
+
+def _deepcopy_slots(obj, memo):
+    """逐字段深拷贝 slots 数据类对象，不可变字段直接引用，绕开通用 deepcopy 的 reduce 流程"""
+    cls = type(obj)
+    new = cls.__new__(cls)
+    memo[id(obj)] = new
+    for name in cls.__slots__:
+        value = getattr(obj, name)
+        if type(value) not in _ATOMIC_TYPES:
+            value = copy.deepcopy(value, memo)
+        setattr(new, name, value)
+    return new
+
+
+@dataclass(slots=True)
 class Tank:
     """
     油罐业务对象
@@ -28,6 +71,30 @@ class Tank:
     min_safe_level: float = 0.0
     tank_type: list = field(default_factory=lambda: ["TARGET", "MIDDLE"])
     status: str = "AVAILABLE"
+    cleaning_required: bool = field(default=False, repr=False)  # 调度过程中的清洗标记
+    occupied_until: datetime = field(default=datetime.min, repr=False)  # 占用截止时间
+    reserved_volume: float = field(default=0.0, repr=False)  # 已预留、不可再分配的体积
+    type_mask: int = field(init=False, default=0, repr=False)  # tank_type 对应的位标记
+
+    def __post_init__(self):
+        tank_type = self.tank_type or ()
+        self.type_mask = 0
+        for name, mask in TANK_TYPE_MASKS.items():
+            if name in tank_type:
+                self.type_mask |= mask
+
+    def copy(self) -> "Tank":
+        """浅拷贝油罐（tank_type 列表只读，与原对象共享）"""
+        return _copy_slots(self)
+
+    def __deepcopy__(self, memo):
+        return _deepcopy_slots(self, memo)
+
+    def __getstate__(self):
+        return _slots_getstate(self)
+
+    def __setstate__(self, state):
+        _slots_setstate(self, state)
 
     def can_supply(self, oil_type: str, required_volume: float) -> bool:
         """检查是否可以供应指定油种和体积"""
@@ -38,14 +105,14 @@ class Tank:
         return True
 
     def reserve(self, volume: float):
-        """预留指定体积的油"""
+        """预留指定体积的油（油罐属于某个 State 时改用 State.reserve_tank，以同步列式数据）"""
         if volume > self.inventory - self.min_safe_level:
             raise ValueError("库存不足，无法预留该体积")
         self.inventory -= volume
         self.status = "RESERVED"
 
     def release(self):
-        """释放预留状态"""
+        """释放预留状态（油罐属于某个 State 时改用 State.release_tank）"""
         self.status = "AVAILABLE"
 
     def to_db(self):
@@ -148,7 +215,7 @@ class CustomerOrder:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class DispatchOrder:
     """
     调度订单业务对象
@@ -166,6 +233,22 @@ class DispatchOrder:
     status: str = "DRAFT"  # 状态: DRAFT/SCHEDULED/RUNNING/COMPLETED/CONFLICT
     cleaning_required: bool = False
 
+    @classmethod
+    def from_customer_order(cls, order: CustomerOrder, suffix: str, volume: float) -> "DispatchOrder":
+        """由客户订单生成调度工单（直接赋值字段，不做深拷贝）"""
+        return cls(
+            dispatch_order_id=str(order.customer_order_id) + suffix,
+            customer_order_id=order.customer_order_id,
+            site_id=order.site_id,
+            oil_type=order.oil_type,
+            required_volume=volume,
+            status="DRAFT"
+        )
+
+    def to_dict(self) -> Dict:
+        """按字段导出为字典（浅拷贝，替代 __slots__ 下不可用的 __dict__）"""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
     def is_scheduled(self) -> bool:
         """检查是否已调度"""
         return self.status in ["SCHEDULED", "RUNNING", "COMPLETED"]
@@ -213,7 +296,7 @@ class Site:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Pipeline:
     """
     管道业务对象
@@ -224,6 +307,69 @@ class Pipeline:
     pipe_shutdown_start_time: Optional[datetime] = None
     pipe_shutdown_end_time: Optional[datetime] = None
     pipe_shutdown_reason: str = ""
+    current_oil: Optional[str] = field(default=None, repr=False)  # 管道内当前油品
+    last_clean_time: Optional[int] = field(default=None, repr=False)  # 上次清洗时间
+    if TYPE_CHECKING:  # 类型检查时按普通列表字段看待，运行时只作构造参数
+        occupancy_schedule: list = field(default_factory=list)
+    else:
+        occupancy_schedule: InitVar[Optional[list]] = None  # 初始占用计划，构造后经 occupancy_schedule 属性读写
+    _occupancy_schedule: list = field(init=False, default_factory=list, repr=False)  # 占用计划，按开始时间有序 [(start_time, end_time, ...), ...]
+    _occupancy_starts: list = field(init=False, default_factory=list, repr=False)  # 各占用的开始时间
+    _occupancy_end_max: list = field(init=False, default_factory=list, repr=False)  # 结束时间的前缀最大值
+
+    def __post_init__(self, occupancy_schedule: Optional[list] = None):
+        self.set_occupancy_schedule(occupancy_schedule or [])
+
+    @property
+    def capacity(self) -> float:
+        """输送能力(吨/小时)，由每米容量折算"""
+        return self.pipe_capacity_per_meter * 100
+
+    def copy(self) -> "Pipeline":
+        """浅拷贝管道，占用计划相关列表单独复制，以便副本独立插入"""
+        new = _copy_slots(self)
+        new._occupancy_schedule = list(self._occupancy_schedule)
+        new._occupancy_starts = list(self._occupancy_starts)
+        new._occupancy_end_max = list(self._occupancy_end_max)
+        return new
+
+    def __deepcopy__(self, memo):
+        return _deepcopy_slots(self, memo)
+
+    def __getstate__(self):
+        return _slots_getstate(self)
+
+    def __setstate__(self, state):
+        _slots_setstate(self, state)
+
+    def set_occupancy_schedule(self, schedule: list):
+        """整体替换占用计划（按开始时间稳定排序）"""
+        self._occupancy_schedule = sorted(schedule, key=lambda occ: occ[0])
+        self._occupancy_starts = [occ[0] for occ in self._occupancy_schedule]
+        self._occupancy_end_max = []
+        self._refresh_end_max(0)
+
+    def add_occupancy(self, occupancy: tuple):
+        """按开始时间插入一条占用记录 (start_time, end_time, ...)"""
+        i = bisect.bisect_right(self._occupancy_starts, occupancy[0])
+        self._occupancy_starts.insert(i, occupancy[0])
+        self._occupancy_schedule.insert(i, occupancy)
+        self._refresh_end_max(i)
+
+    def _refresh_end_max(self, start: int):
+        """从第 start 条起重算结束时间的前缀最大值"""
+        end_max = self._occupancy_end_max
+        del end_max[start:]
+        current = end_max[-1] if end_max else None
+        for occ in self._occupancy_schedule[start:]:
+            current = occ[1] if current is None or occ[1] > current else current
+            end_max.append(current)
+
+    def has_time_conflict(self, start_time, end_time) -> bool:
+        """检查 [start_time, end_time) 是否与已有占用重叠"""
+        # 开始时间早于 end_time 的占用只可能是前 idx 条，其中任一结束时间晚于 start_time 即冲突
+        idx = bisect.bisect_left(self._occupancy_starts, end_time)
+        return idx > 0 and self._occupancy_end_max[idx - 1] > start_time
 
     def to_db(self):
         """将业务对象转换为 SQLAlchemy 模型"""
@@ -238,7 +384,16 @@ class Pipeline:
         )
 
 
-@dataclass
+# 读取返回有序的占用计划；整体赋值时经 set_occupancy_schedule 排序并重建索引。
+# 与同名的构造参数（InitVar）冲突，只能在数据类生成之后挂到类上
+Pipeline.occupancy_schedule = property(  # type: ignore[misc, assignment]
+    lambda self: self._occupancy_schedule,
+    Pipeline.set_occupancy_schedule,
+    doc="占用计划，按开始时间有序；请用 add_occupancy 插入，整体赋值等同于 set_occupancy_schedule"
+)
+
+
+@dataclass(slots=True)
 class Branch:
     """
     管线分支业务对象
@@ -255,6 +410,19 @@ class Branch:
     is_end: str = ""
     is_middle: str = ""
 
+    def copy(self) -> "Branch":
+        """浅拷贝分支"""
+        return _copy_slots(self)
+
+    def __deepcopy__(self, memo):
+        return _deepcopy_slots(self, memo)
+
+    def __getstate__(self):
+        return _slots_getstate(self)
+
+    def __setstate__(self, state):
+        _slots_setstate(self, state)
+
     def to_db(self):
         """将业务对象转换为 SQLAlchemy 模型"""
         from models import BranchDB
@@ -5,7 +5,6 @@ import uuid
 import time
 from dataclasses import dataclass, field
 from data_class import DispatchOrder, Tank, Pipeline, Branch
-from copy import deepcopy
 from state import State
 
 class DispatchOrderQueueManager:
@@ -205,7 +204,7 @@ class DispatchOrderQueueManager:
             prev_state = self.real_system_state
         
         # 创建新状态并应用调度工单
-        new_state = prev_state.apply_dispatch_order(dispatch_order.__dict__)
+        new_state = prev_state.apply_dispatch_order(dispatch_order.to_dict())
         
         # 添加到状态链
         self.state_chain.append((dispatch_order.dispatch_order_id, new_state))
@@ -306,12 +305,12 @@ class DispatchOrderQueueManager:
         self.virtual_state_map = {}
         
         # 从真实系统状态开始，逐步应用每个订单
-        current_state = deepcopy(self.real_system_state)
+        current_state = self.real_system_state.clone()
         
         # 按队列顺序重新应用所有订单
         for order in self.queue:
             # 应用订单到当前状态
-            new_state = current_state.apply_dispatch_order(order.__dict__)
+            new_state = current_state.apply_dispatch_order(order.to_dict())
             
             # 添加到状态链
             self.state_chain.append((order.dispatch_order_id, new_state))
@@ -377,7 +376,7 @@ class DispatchOrderQueueManager:
             order = self.order_registry[dispatch_order_id]
             
             # 应用订单到真实系统状态
-            self.real_system_state = self.real_system_state.apply_dispatch_order(order.__dict__)
+            self.real_system_state = self.real_system_state.apply_dispatch_order(order.to_dict())
             
             # 从队列和状态映射中移除已完成的订单
             if dispatch_order_id in self.order_registry:
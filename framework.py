@@ -9,6 +9,11 @@ from copy import deepcopy
 from typing import List, Dict, Tuple, Optional, Any
 import time
 import math
+import bisect
+
+import numpy as np
+
+from oil_codes import NO_OIL, OIL_CODES, oil_code
 
 # ======================
 # 1. 基础数据模型 - 保持不变
@@ -16,17 +21,23 @@ import math
 
 class Tank:
     """油罐静态属性（业务配置）"""
+    __slots__ = ('id', 'capacity', 'current_level', 'compatible_oils', '_compat_codes',
+                 'safety_min', 'safety_max', 'location')
+    
     def __init__(self, id: str, capacity: float, current_level: float, 
                  compatible_oils: List[str], safety_level: Tuple[float, float]):
         self.id = id
         self.capacity = capacity  # 总容量(吨)
         self.current_level = current_level  # 当前库存(吨)
         self.compatible_oils = set(compatible_oils)  # 兼容油品集合
+        self._compat_codes = frozenset(oil_code(o) for o in self.compatible_oils)  # 兼容油品编码集合
         self.safety_min, self.safety_max = safety_level  # 安全液位范围(吨)
         self.location = "station"  # 位置类型: station/terminal/customer
 
 class Pipeline:
     """管线静态属性（业务配置）"""
+    __slots__ = ('id', 'start_node', 'end_node', 'capacity', 'max_pressure', 'length')
+    
     def __init__(self, id: str, start_node: str, end_node: str, 
                  capacity: float, max_pressure: float):
         self.id = id
@@ -38,13 +49,20 @@ class Pipeline:
 
 class CustomerOrder:
     """客户订单"""
+    __slots__ = ('id', 'customer', 'oil_type', '_oil_code', 'total_quantity', 'remaining_quantity',
+                 'time_window', 'priority', 'target_tank_id', 'fulfillment_history', '_fully_scheduled')
+    
+    SCHEDULED_TOLERANCE = 0.1  # 剩余量不超过该值即视为调度完成（允许小数点误差）
+    
     def __init__(self, id: str, customer: str, oil_type: str, quantity: float,
                  time_window: Tuple[int, int], priority: int, target_tank_id: str):
         self.id = id
         self.customer = customer
         self.oil_type = oil_type
+        self._oil_code = oil_code(oil_type)  # 油品编码
         self.total_quantity = quantity  # 订单总数量
-        self.remaining_quantity = quantity  # 剩余未调度数量
+        self.remaining_quantity = quantity  # 剩余未调度数量，只经 mark_partial_fulfillment 修改
+        self._fully_scheduled = quantity <= self.SCHEDULED_TOLERANCE  # 完成标记，随剩余量一起更新
         self.time_window = time_window  # (最早开始时间, 最晚完成时间) 时间戳
         self.priority = priority  # 优先级(1-10, 越大越重要)
         self.target_tank_id = target_tank_id  # 目标油罐ID
@@ -52,19 +70,22 @@ class CustomerOrder:
     
     def is_fully_scheduled(self) -> bool:
         """检查订单是否已全部调度完成"""
-        return self.remaining_quantity <= 0.1  # 允许小数点误差
+        return self._fully_scheduled
     
     def mark_partial_fulfillment(self, dispatch_id: str, quantity: float, end_time: int):
         """记录部分完成"""
-        self.remaining_quantity -= quantity
-        self.fulfillment_history.append((dispatch_id, quantity, end_time))
-        
         # 确保剩余量不为负
-        if self.remaining_quantity < 0:
-            self.remaining_quantity = 0
+        remaining = max(self.remaining_quantity - quantity, 0)
+        self.remaining_quantity = remaining
+        self._fully_scheduled = remaining <= self.SCHEDULED_TOLERANCE
+        self.fulfillment_history.append((dispatch_id, quantity, end_time))
 
 class DispatchOrder:
     """调度工单（输出结果）"""
+    __slots__ = ('dispatch_id', 'order_id', 'oil_type', 'quantity', 'source_tank_id', 'target_tank_id',
+                 'pipeline_path', 'start_time', 'end_time', 'status', 'cleaning_required',
+                 'is_partial', 'remaining_after')
+    
     def __init__(self, order_id: str, oil_type: str, quantity: float,
                  source_tank_id: str, target_tank_id: str, 
                  pipeline_path: List[str], start_time: int, end_time: int,
@@ -89,21 +110,64 @@ class DispatchOrder:
 
 class TankState(Tank):
     """动态油罐状态（继承静态属性）"""
+    __slots__ = ('_current_oil', '_oil_code', 'occupied_until', 'last_clean_time')
+    
     def __init__(self, tank: Tank):
         super().__init__(tank.id, tank.capacity, tank.current_level, 
                         tank.compatible_oils, (tank.safety_min, tank.safety_max))
         self.current_oil = None  # 当前存储油品类型(动态)
         self.occupied_until = 0  # 被占用到的时间戳(动态)
         self.last_clean_time = 0  # 上次清洗时间(动态)
+    
+    @property
+    def current_oil(self) -> Optional[str]:
+        return self._current_oil
+    
+    @current_oil.setter
+    def current_oil(self, oil_type: Optional[str]):
+        # 同步维护油品编码，调度规则只比较 _oil_code
+        self._current_oil = oil_type
+        self._oil_code = oil_code(oil_type)
 
 class PipelineState(Pipeline):
     """动态管线状态（继承静态属性）"""
+    __slots__ = ('current_oil', 'last_clean_time', 'occupancy_schedule', 'occ_start', 'occ_end_max')
+    
     def __init__(self, pipeline: Pipeline):
         super().__init__(pipeline.id, pipeline.start_node, pipeline.end_node,
                         pipeline.capacity, pipeline.max_pressure)
         self.current_oil = None  # 当前输送油品(动态)
         self.last_clean_time = 0  # 上次清洗时间(动态)
-        self.occupancy_schedule = []  # 占用计划 [(start_time, end_time, oil_type, quantity), ...]
+        self.occupancy_schedule = []  # 占用计划，按开始时间有序 [(start_time, end_time, oil_code, quantity), ...]
+        self.occ_start = np.empty(0)  # 各占用的开始时间（有序）
+        self.occ_end_max = np.empty(0)  # 按开始时间排序后结束时间的前缀最大值
+    
+    def add_occupancy(self, start_time: int, end_time: int, oil_type: str, quantity: float):
+        """按开始时间插入占用记录，并同步刷新冲突检测用的数组"""
+        bisect.insort(self.occupancy_schedule, (start_time, end_time, oil_code(oil_type), quantity))
+        schedule = self.occupancy_schedule
+        self.occ_start = np.fromiter((occ[0] for occ in schedule), dtype=float, count=len(schedule))
+        self.occ_end_max = np.maximum.accumulate(
+            np.fromiter((occ[1] for occ in schedule), dtype=float, count=len(schedule))
+        )
+    
+    def has_conflict(self, start_time: float, end_time: float) -> bool:
+        """检查 [start_time, end_time) 是否与已有占用重叠"""
+        # 开始时间早于 end_time 的占用只可能是前 i 个，其中任一结束时间晚于 start_time 即冲突
+        i = np.searchsorted(self.occ_start, end_time)
+        return bool(i > 0 and self.occ_end_max[i - 1] > start_time)
+
+def _reset_slots(dst, src):
+    """
+    用 src 逐字段覆盖 dst，字段取 type(src).__mro__ 上各类声明的 __slots__
+    列表/集合/字典复制一份；数组只会整体替换，不会就地修改，可直接共享
+    """
+    for cls in type(src).__mro__:
+        for name in cls.__dict__.get('__slots__', ()):
+            value = getattr(src, name)
+            if type(value) in (list, set, dict):
+                value = value.copy()
+            setattr(dst, name, value)
 
 class SchedulingState:
     """当前调度状态（包含已占用资源）"""
@@ -126,6 +190,25 @@ class SchedulingState:
         # 初始化管线占用
         for pipeline_id, pipeline in self.pipelines.items():
             pipeline.current_oil = None
+    
+    def reset_from(self, other: "SchedulingState"):
+        """
+        用 other 的内容就地覆盖当前状态，复用已有的油罐/管线状态对象
+        要求两者的油罐ID、管线ID集合一致
+        """
+        for tank_id, src in other.tanks.items():
+            _reset_slots(self.tanks[tank_id], src)
+        
+        for pipeline_id, src in other.pipelines.items():
+            _reset_slots(self.pipelines[pipeline_id], src)
+        
+        # 全局状态（计数器、部分调度记录等）
+        for name in list(self.__dict__):
+            if name not in other.__dict__:
+                del self.__dict__[name]
+        for name, value in other.__dict__.items():
+            if name != "tanks" and name != "pipelines":
+                self.__dict__[name] = deepcopy(value)
 
 # ======================
 # 3. 优化策略接口 - 保持不变
@@ -134,6 +217,9 @@ class SchedulingState:
 class PathScoringStrategy(ABC):
     """路径评分策略接口（为GA优化预留）"""
     
+    # 为 True 时对所有可行路径评分取最高分；否则按预排序的路径顺序取第一条可行路径
+    requires_full_scan = False
+    
     @abstractmethod
     def calculate_score(self, path: List[str], oil_type: str, start_time: int, 
                        state: SchedulingState, quantity: float) -> float:
@@ -146,6 +232,10 @@ class PathScoringStrategy(ABC):
 class RuleBasedScoring(PathScoringStrategy):
     """规则基础评分策略（初版实现）"""
     
+    # 评分按管线逐段累加且取决于管线当前油品，段数多的路径可能得分更高，
+    # 与静态偏好顺序不一致，必须全量评分
+    requires_full_scan = True
+    
     def calculate_score(self, path: List[str], oil_type: str, start_time: int,
                        state: SchedulingState, quantity: float) -> float:
         """
@@ -185,6 +275,14 @@ class RuleBasedScoring(PathScoringStrategy):
         
         return score
 
+class PreferenceOrderScoring(RuleBasedScoring):
+    """
+    按静态偏好选路的评分策略：管线段少、瓶颈能力大的路径优先，取第一条可行路径
+    返回的分数沿用规则评分，只作记录，不参与选路
+    """
+    
+    requires_full_scan = False
+
 # ======================
 # 4. 调度核心算法 - 重点重构部分
 # ======================
@@ -194,10 +292,41 @@ class PipelineScheduler:
     
     def __init__(self, path_scoring_strategy: PathScoringStrategy = None,
                  max_batch_ratio: float = 0.4,  # 单次最大调度比例
-                 min_batch_size: float = 50.0):  # 最小批次大小(吨)
+                 min_batch_size: float = 50.0,  # 最小批次大小(吨)
+                 oil_compatibility_matrix: Dict[Tuple[str, str], float] = None):  # 油品兼容性 {(油品1, 油品2): 分数}
         self.path_scoring_strategy = path_scoring_strategy or RuleBasedScoring()
         self.max_batch_ratio = max_batch_ratio  # 防止单次调度过大比例
         self.min_batch_size = min_batch_size     # 保证最小批次有意义
+        self.oil_compatibility_matrix = oil_compatibility_matrix or {}
+        self._wash_time_sec = 2.0 * 3600  # 清洗时间(秒)，当前与油罐无关
+        self._path_cache = {}  # (source, target) -> 按偏好预排序的路径列表
+        self._scratch_state_pool: List[SchedulingState] = []  # 可复用的调度状态对象
+        self._scratch_pool_size = 2  # 暂存池上限
+    
+    @property
+    def oil_compatibility_matrix(self) -> Dict[Tuple[str, str], float]:
+        return self._oil_compatibility_matrix
+    
+    @oil_compatibility_matrix.setter
+    def oil_compatibility_matrix(self, matrix: Dict[Tuple[str, str], float]):
+        # 重新赋值时作废按油品编码预计算的分数矩阵
+        self._oil_compatibility_matrix = matrix
+        self._oil_compat_scores = None
+    
+    def _oil_compat_score_matrix(self) -> np.ndarray:
+        """
+        按油品编码预计算的兼容性分数矩阵 (K+1)x(K+1)
+        最后一行/列对应 NO_OIL，可直接用 -1 索引；油品编码表增长时重建
+        """
+        scores = self._oil_compat_scores
+        if scores is None or scores.shape[0] != len(OIL_CODES) + 1:
+            names = [None] * (len(OIL_CODES) + 1)
+            for name, code in OIL_CODES.items():
+                names[code] = name
+            scores = np.array([[self._oil_compatibility_score(oil1, oil2) for oil2 in names]
+                               for oil1 in names])
+            self._oil_compat_scores = scores
+        return scores
     
     def find_feasible_path(self, source_tank_id: str, target_tank_id: str, 
                           oil_type: str, quantity: float, start_time: int,
@@ -206,16 +335,20 @@ class PipelineScheduler:
         寻找可行路径
         返回: (路径列表, 评分) 或 None
         """
-        # 1. 获取所有可能路径（简化：直接返回预定义路径）
+        # 1. 默认策略：按预排序的偏好顺序返回第一条可行路径
         # 实际系统应使用图算法（BFS/DFS）计算所有可行路径
-        possible_paths = self._get_all_paths(source_tank_id, target_tank_id, state)
-        
-        if not possible_paths:
+        if not self.path_scoring_strategy.requires_full_scan:
+            for path in self._get_sorted_paths(source_tank_id, target_tank_id, state):
+                if self._check_capacity(path, quantity, start_time, state):
+                    score = self.path_scoring_strategy.calculate_score(
+                        path, oil_type, start_time, state, quantity
+                    )
+                    return path, score
             return None
         
-        # 2. 为每条路径评分
+        # 2. 策略要求全量评分时，按原始路径顺序逐条评分（保持同分时的选择顺序）
         scored_paths = []
-        for path in possible_paths:
+        for path in self._get_all_paths(source_tank_id, target_tank_id, state):
             # 能力校验
             if not self._check_capacity(path, quantity, start_time, state):
                 continue
@@ -233,6 +366,19 @@ class PipelineScheduler:
         best_path = max(scored_paths, key=lambda x: x[1])
         return best_path
     
+    def _get_sorted_paths(self, source: str, target: str, state: SchedulingState) -> List[List[str]]:
+        """获取按偏好排序的路径（管线段少、瓶颈能力大的优先），结果按起止油罐缓存，每次 rolling_schedule 开始时清空"""
+        key = (source, target)
+        paths = self._path_cache.get(key)
+        if paths is None:
+            pipelines = state.pipelines
+            paths = sorted(
+                self._get_all_paths(source, target, state),
+                key=lambda p: (len(p), -min((pipelines[pid].capacity for pid in p), default=0.0))
+            )
+            self._path_cache[key] = paths
+        return paths
+    
     def _get_all_paths(self, source: str, target: str, state: SchedulingState) -> List[List[str]]:
         """获取所有可能路径（简化实现）"""
         # 实际系统应使用图遍历算法
@@ -257,10 +403,8 @@ class PipelineScheduler:
                 return False
             
             # 检查时间冲突（简化：只检查当前占用）
-            for occ in pipeline.occupancy_schedule:
-                occ_start, occ_end, _, _ = occ
-                if not (end_time <= occ_start or start_time >= occ_end):
-                    return False  # 时间冲突
+            if pipeline.has_conflict(start_time, end_time):
+                return False  # 时间冲突
         
         return True
     
@@ -273,7 +417,7 @@ class PipelineScheduler:
     def calculate_wash_time(self, tank: TankState) -> float:
         """计算清洗时间（小时）"""
         # 简化：固定2小时
-        return 2.0
+        return self._wash_time_sec / 3600
     
     def determine_batch_size(self, order: CustomerOrder, state: SchedulingState) -> float:
         """
@@ -293,7 +437,7 @@ class PipelineScheduler:
         for tank_id in available_tanks:
             tank = state.tanks[tank_id]
             available = tank.current_level - tank.safety_min
-            if tank.current_oil == order.oil_type:  # 同油品优先
+            if tank._oil_code == order._oil_code:  # 同油品优先
                 available = min(available, tank.current_level * 0.8)  # 保留20%余量
             max_available = max(max_available, available)
         
@@ -567,7 +711,7 @@ class PipelineScheduler:
                 continue
                 
             available_oil = tank.current_level - tank.safety_min
-            if tank.current_oil == order.oil_type:
+            if tank._oil_code == order._oil_code:
                 available_oil = min(available_oil, tank.current_level * 0.9)  # 紧急情况下只保留10%余量
             
             if available_oil < self.min_batch_size:
@@ -577,13 +721,12 @@ class PipelineScheduler:
             batch_size = min(available_oil, order.remaining_quantity, self.max_batch_size)
             
             # 检查是否需要清洗
-            need_cleaning = tank.current_oil is not None and tank.current_oil != order.oil_type
+            need_cleaning = tank._oil_code != NO_OIL and tank._oil_code != order._oil_code
             
             # 计算开始时间
             earliest_start = max(tank.occupied_until, order.time_window[0])
             if need_cleaning:
-                wash_time = self.calculate_wash_time(tank)
-                earliest_start += wash_time * 3600  # 转换为秒
+                earliest_start += self._wash_time_sec
             
             # 寻找可行路径
             path_result = self.find_feasible_path(
@@ -621,9 +764,11 @@ class PipelineScheduler:
         # 2. 如果没有完全兼容的油罐，查找需要清洗但油品相似的
         if not sorted_tanks:
             all_available = self._find_available_tanks(order, state)
+            compat_scores = self._oil_compat_score_matrix()[:, order._oil_code].tolist()
+            wash_time_sec = self._wash_time_sec
             sorted_tanks = sorted(all_available, key=lambda t: (
-                state.tanks[t].occupied_until + self.calculate_wash_time(state.tanks[t]) * 3600,
-                self._oil_compatibility_score(state.tanks[t].current_oil, order.oil_type)
+                state.tanks[t].occupied_until + wash_time_sec,
+                compat_scores[state.tanks[t]._oil_code]
             ), reverse=True)
         
         best_option = None
@@ -634,7 +779,7 @@ class PipelineScheduler:
             
             # 检查库存
             available_oil = tank.current_level - tank.safety_min
-            if tank.current_oil == order.oil_type:
+            if tank._oil_code == order._oil_code:
                 available_oil = min(available_oil, tank.current_level * 0.8)  # 保留20%余量
             
             if available_oil < self.min_batch_size:
@@ -651,13 +796,12 @@ class PipelineScheduler:
                 continue
             
             # 检查是否需要清洗
-            need_cleaning = tank.current_oil is not None and tank.current_oil != order.oil_type
+            need_cleaning = tank._oil_code != NO_OIL and tank._oil_code != order._oil_code
             
             # 计算开始时间
             earliest_start = max(tank.occupied_until, order.time_window[0])
             if need_cleaning:
-                wash_time = self.calculate_wash_time(tank)
-                earliest_start += wash_time * 3600
+                earliest_start += self._wash_time_sec
             
             # 寻找可行路径
             path_result = self.find_feasible_path(
@@ -685,8 +829,8 @@ class PipelineScheduler:
         适用: 系统负载高时
         目标: 平衡油罐和管道使用，避免瓶颈
         """
-        # 1. 评估所有油罐的负载和兼容性
-        tank_scores = []
+        # 1. 筛选兼容且库存充足的油罐
+        candidates = []
         available_tanks = self._find_available_tanks(order, state)
         
         for tank_id in available_tanks:
@@ -700,22 +844,14 @@ class PipelineScheduler:
             if available_oil < self.min_batch_size:
                 continue
             
-            # 计算资源平衡分数 (1.0 = 完美平衡)
-            utilization_score = 1.0 - min(1.0, tank.occupied_until / (current_time + 86400))  # 未来24小时利用率
-            inventory_score = min(1.0, available_oil / tank.capacity)  # 库存利用率
-            compatibility_score = 1.0 if tank.current_oil == order.oil_type else 0.6  # 油品兼容性
-            
-            # 综合评分
-            score = (
-                utilization_score * 0.4 +
-                inventory_score * 0.3 +
-                compatibility_score * 0.3
-            )
-            
-            tank_scores.append((tank_id, score, available_oil))
+            candidates.append((tank_id, available_oil))
         
-        # 2. 按评分排序
-        tank_scores.sort(key=lambda x: x[1], reverse=True)
+        # 2. 批量计算资源平衡分数，并按评分排序
+        scores = self._evaluate_tanks(order, [state.tanks[tid] for tid, _ in candidates], current_time)
+        tank_scores = [
+            (candidates[i][0], scores[i], candidates[i][1])
+            for i in np.argsort(-scores, kind="stable")
+        ]
         
         # 3. 选择最佳选项
         for tank_id, score, available_oil in tank_scores:
@@ -732,13 +868,12 @@ class PipelineScheduler:
                 continue
             
             # 检查是否需要清洗
-            need_cleaning = tank.current_oil is not None and tank.current_oil != order.oil_type
+            need_cleaning = tank._oil_code != NO_OIL and tank._oil_code != order._oil_code
             
             # 计算开始时间
             earliest_start = max(tank.occupied_until, order.time_window[0])
             if need_cleaning:
-                wash_time = self.calculate_wash_time(tank)
-                earliest_start += wash_time * 3600
+                earliest_start += self._wash_time_sec
             
             # 寻找可行路径 (考虑负载平衡)
             path_result = self.find_feasible_path(
@@ -759,6 +894,29 @@ class PipelineScheduler:
         
         return (None, None, None, None, None, None)
     
+    def _evaluate_tanks(self, order: CustomerOrder, tanks: List[TankState], current_time: float) -> np.ndarray:
+        """
+        计算资源平衡分数 (1.0 = 完美平衡)
+        除法统一换成倒数乘法，一次向量化运算完成所有油罐的评分
+        """
+        n = len(tanks)
+        occupied_until = np.fromiter((t.occupied_until for t in tanks), dtype=float, count=n)
+        available_oil = np.fromiter((t.current_level - t.safety_min for t in tanks), dtype=float, count=n)
+        inv_capacity = 1.0 / np.fromiter((t.capacity for t in tanks), dtype=float, count=n)
+        same_oil = np.fromiter((t._oil_code == order._oil_code for t in tanks), dtype=bool, count=n)
+        inv_window = 1.0 / (current_time + 86400)
+        
+        utilization_score = 1.0 - np.minimum(1.0, occupied_until * inv_window)  # 未来24小时利用率
+        inventory_score = np.minimum(1.0, available_oil * inv_capacity)  # 库存利用率
+        compatibility_score = np.where(same_oil, 1.0, 0.6)  # 油品兼容性
+        
+        # 综合评分
+        return (
+            utilization_score * 0.4 +
+            inventory_score * 0.3 +
+            compatibility_score * 0.3
+        )
+    
     def _apply_processing_time_rule(self, order: CustomerOrder, state: SchedulingState, current_time: float):
         """
         启发式规则4: 最小化处理时间
@@ -792,14 +950,13 @@ class PipelineScheduler:
                 continue
             
             # 检查是否需要清洗
-            need_cleaning = tank.current_oil is not None and tank.current_oil != order.oil_type
+            need_cleaning = tank._oil_code != NO_OIL and tank._oil_code != order._oil_code
             
             # 计算开始时间
             earliest_start = max(tank.occupied_until, order.time_window[0])
             wash_time_sec = 0
             if need_cleaning:
-                wash_time = self.calculate_wash_time(tank)
-                wash_time_sec = wash_time * 3600
+                wash_time_sec = self._wash_time_sec
                 earliest_start += wash_time_sec
             
             # 寻找可行路径
@@ -831,7 +988,7 @@ class PipelineScheduler:
         """查找无需清洗的兼容油罐"""
         compatible = []
         for tank_id, tank in state.tanks.items():
-            if tank.current_oil == order.oil_type and tank.current_level > tank.safety_min + self.min_batch_size:
+            if tank._oil_code == order._oil_code and tank.current_level > tank.safety_min + self.min_batch_size:
                 compatible.append(tank_id)
         return compatible
     
@@ -863,20 +1020,19 @@ class PipelineScheduler:
         for tank_id in available_tanks:
             tank = state.tanks[tank_id]
             available_oil = tank.current_level - tank.safety_min
-            if tank.current_oil == order.oil_type:
+            if tank._oil_code == order._oil_code:
                 available_oil = min(available_oil, tank.current_level * 0.8)
             
             if available_oil < batch_size:
                 continue
             
             need_cleaning = False
-            if tank.current_oil is not None and tank.current_oil != order.oil_type:
+            if tank._oil_code != NO_OIL and tank._oil_code != order._oil_code:
                 need_cleaning = True
             
             earliest_start = max(tank.occupied_until, order.time_window[0])
             if need_cleaning:
-                wash_time = self.calculate_wash_time(tank)
-                earliest_start += wash_time * 3600
+                earliest_start += self._wash_time_sec
             
             path_result = self.find_feasible_path(
                 tank_id, order.target_tank_id, order.oil_type, batch_size, 
@@ -918,7 +1074,7 @@ class PipelineScheduler:
         
         for tank_id, tank in state.tanks.items():
             # 1. 油品兼容性检查
-            if order.oil_type not in tank.compatible_oils:
+            if order._oil_code not in tank._compat_codes:
                 continue
             
             # 2. 安全液位检查
@@ -929,10 +1085,10 @@ class PipelineScheduler:
             # 3. 计算优先级得分
             score = 0
             # 同油品优先
-            if tank.current_oil == order.oil_type:
+            if tank._oil_code == order._oil_code:
                 score += 100
             # 未使用油罐优先
-            elif tank.current_oil is None:
+            elif tank._oil_code == NO_OIL:
                 score += 50
             # 位置优先级
             if tank.location == "station":
@@ -960,10 +1116,10 @@ class PipelineScheduler:
         for pipeline_id in dispatch_order.pipeline_path:
             pipeline = state.pipelines[pipeline_id]
             pipeline.current_oil = dispatch_order.oil_type
-            pipeline.occupancy_schedule.append((
+            pipeline.add_occupancy(
                 dispatch_order.start_time, dispatch_order.end_time, 
                 dispatch_order.oil_type, dispatch_order.quantity
-            ))
+            )
     
     def rolling_schedule(self, orders: List[CustomerOrder], base_state: SchedulingState, 
                         max_cycles: int = 10) -> Tuple[List[DispatchOrder], List[CustomerOrder]]:
@@ -973,9 +1129,34 @@ class PipelineScheduler:
         2. 多轮调度，每轮处理优先级最高的可调度部分
         3. 冲突处理
         """
-        # 1. 创建状态副本（不修改原始状态）
-        state = deepcopy(base_state)
-        
+        # 1. 创建状态副本（不修改原始状态），优先复用暂存池中的状态对象
+        # 路径排序依赖管线能力，每次滚动调度的管线可能不同，作废上一次的排序缓存
+        self._path_cache.clear()
+        state = self._acquire_scratch(base_state)
+        try:
+            return self._rolling_schedule(orders, state, max_cycles)
+        finally:
+            self._release_scratch(state)
+    
+    def _acquire_scratch(self, base_state: SchedulingState) -> SchedulingState:
+        """从暂存池取出状态对象并用 base_state 覆盖；资源集合不一致时退回深拷贝"""
+        while self._scratch_state_pool:
+            state = self._scratch_state_pool.pop()
+            if (type(state) is type(base_state)
+                    and state.tanks.keys() == base_state.tanks.keys()
+                    and state.pipelines.keys() == base_state.pipelines.keys()):
+                state.reset_from(base_state)
+                return state
+        return deepcopy(base_state)
+    
+    def _release_scratch(self, state: SchedulingState):
+        """归还状态对象到暂存池（超出上限则丢弃）"""
+        if len(self._scratch_state_pool) < self._scratch_pool_size:
+            self._scratch_state_pool.append(state)
+    
+    def _rolling_schedule(self, orders: List[CustomerOrder], state: SchedulingState,
+                          max_cycles: int) -> Tuple[List[DispatchOrder], List[CustomerOrder]]:
+        """滚动调度主循环，state 为可直接修改的状态副本"""
         # 2. 创建订单副本（不修改原始订单）
         order_copies = [deepcopy(order) for order in orders]
         
@@ -1021,8 +1202,10 @@ class PipelineScheduler:
         partially_scheduled = []
         fully_infeasible = []
         
+        # 订单ID -> 副本（逆序构建，ID重复时保留第一个副本）
+        copies_by_id = {o.id: o for o in reversed(order_copies)}
         for original_order in orders:
-            copy = next((o for o in order_copies if o.id == original_order.id), None)
+            copy = copies_by_id.get(original_order.id)
             if copy:
                 if copy.is_fully_scheduled():
                     continue
@@ -11,8 +11,24 @@ from sqlalchemy.orm import declarative_base, relationship, sessionmaker
 
 Base = declarative_base()
 
+class BusinessModel:
+    """
+    ORM 模型到业务对象的转换
+    
+    子类声明 __business_class__（data_class 中的类名）和 __business_columns__（业务字段，与 ORM 列同名），
+    to_object 与批量加载共用这一份字段列表
+    """
+    __business_class__: str = ""
+    __business_columns__: tuple = ()
+
+    def to_object(self):
+        """将 SQLAlchemy 模型转换为业务对象"""
+        import data_class
+        business_class = getattr(data_class, self.__business_class__)
+        return business_class(**{name: getattr(self, name) for name in self.__business_columns__})
+
 # === SQLAlchemy ORM 实体定义 ===
-class TankDB(Base):
+class TankDB(BusinessModel, Base):
     __tablename__ = 'tank'
     tank_id = Column(String(50), primary_key=True)  
     site_id = Column(String(50), primary_key=True)  
@@ -30,42 +46,24 @@ class TankDB(Base):
     min_safe_level = Column(Float, default=0.0) # 最低罐位
     status = Column(String(20), default="AVAILABLE")
 
-    def to_object(self):
-        """将 SQLAlchemy 模型转换为业务对象"""
-        from data_class import Tank
-        return Tank(
-            tank_id=self.tank_id,
-            site_id=self.site_id,
-            tank_name=self.tank_name,
-            tank_area=self.tank_area,
-            tank_type=self.tank_type,
-            oil_type=self.oil_type,
-            inventory=self.inventory,
-            current_level=self.current_level,
-            tank_capacity_per_meter=self.tank_capacity_per_meter,
-            maximum_tank_capacity=self.maximum_tank_capacity,
-            safe_tank_capacity=self.safe_tank_capacity,
-            maximum_tank_level=self.maximum_tank_level,
-            safe_tank_level=self.safe_tank_level,
-            min_safe_level=self.min_safe_level,
-            status=self.status
-        )
+    # 对应的业务对象类（data_class 中的类名）及其字段，to_object 和批量加载都只用这些列
+    __business_class__ = 'Tank'
+    __business_columns__ = ('tank_id', 'site_id', 'tank_name', 'tank_area', 'tank_type', 'oil_type',
+                            'inventory', 'current_level', 'tank_capacity_per_meter', 'maximum_tank_capacity',
+                            'safe_tank_capacity', 'maximum_tank_level', 'safe_tank_level', 'min_safe_level',
+                            'status')
 
-class CustomerDB(Base):
+class CustomerDB(BusinessModel, Base):
     __tablename__ = 'customer'
 
     customer_id = Column(String(50), primary_key=True)
     customer_name = Column(String(100))
 
-    def to_object(self):
-        """将 SQLAlchemy 模型转换为业务对象"""
-        from data_class import Customer
-        return Customer(
-            customer_id=self.customer_id,
-            customer_name=self.customer_name
-        )
+    # 对应的业务对象类（data_class 中的类名）及其字段，to_object 和批量加载都只用这些列
+    __business_class__ = 'Customer'
+    __business_columns__ = ('customer_id', 'customer_name')
 
-class CustomerOrderDB(Base):
+class CustomerOrderDB(BusinessModel, Base):
     __tablename__ = 'customer_order'
 
     customer_order_id = Column(Integer, primary_key=True, autoincrement=True)  # 修正拼写错误
@@ -84,28 +82,14 @@ class CustomerOrderDB(Base):
     branch_end_time = Column(DateTime) # 支线计划完成输送时间
     status = Column(String(50), default="PENDING")
 
-    def to_object(self):
-        """将 SQLAlchemy 模型转换为业务对象"""
-        from data_class import CustomerOrder
-        return CustomerOrder(
-            customer_order_id=self.customer_order_id,
-            customer_id=self.customer_id,
-            customer_name=self.customer_name,
-            oil_type=self.oil_type,
-            required_volume=self.required_volume,
-            dispatched_volume=self.dispatched_volume,
-            undispatched_volume=self.undispatched_volume,
-            start_time=self.start_time,
-            end_time=self.end_time,
-            priority=self.priority,
-            entry_tank_id=self.entry_tank_id,
-            finish_storage_tank_time=self.finish_storage_tank_time,
-            branch_start_time=self.branch_start_time,
-            branch_end_time=self.branch_end_time,
-            status=self.status
-        )
+    # 对应的业务对象类（data_class 中的类名）及其字段，to_object 和批量加载都只用这些列
+    __business_class__ = 'CustomerOrder'
+    __business_columns__ = ('customer_order_id', 'customer_id', 'customer_name', 'oil_type',
+                            'required_volume', 'dispatched_volume', 'undispatched_volume', 'start_time',
+                            'end_time', 'priority', 'entry_tank_id', 'finish_storage_tank_time',
+                            'branch_start_time', 'branch_end_time', 'status')
 
-class DispatchOrderDB(Base):
+class DispatchOrderDB(BusinessModel, Base):
     __tablename__ = 'dispatch_order'
 
     dispatch_order_id = Column(Integer, primary_key=True, autoincrement=True)
@@ -120,37 +104,22 @@ class DispatchOrderDB(Base):
     status = Column(String(50), default="DRAFT")  # 状态: DRAFT/SCHEDULED/RUNNING/COMPLETED/CONFLICT
     cleaning_required = Column(Boolean, default=False)  # 是否需要清洗
 
-    def to_object(self):
-        """将 SQLAlchemy 模型转换为业务对象"""
-        from data_class import DispatchOrder
-        return DispatchOrder(
-            dispatch_order_id=self.dispatch_order_id,
-            customer_order_id=self.customer_order_id,
-            oil_type=self.oil_type,
-            required_volume=self.required_volume,
-            source_tank_id=self.source_tank_id,
-            target_tank_id=self.target_tank_id,
-            pipeline_path=self.pipeline_path,
-            start_time=self.start_time,
-            end_time=self.end_time,
-            status=self.status,
-            cleaning_required=self.cleaning_required
-        )
+    # 对应的业务对象类（data_class 中的类名）及其字段，to_object 和批量加载都只用这些列
+    __business_class__ = 'DispatchOrder'
+    __business_columns__ = ('dispatch_order_id', 'customer_order_id', 'oil_type', 'required_volume',
+                            'source_tank_id', 'target_tank_id', 'pipeline_path', 'start_time', 'end_time',
+                            'status', 'cleaning_required')
 
-class SiteDB(Base):
+class SiteDB(BusinessModel, Base):
     __tablename__ = 'site'
     site_id = Column(String(50), primary_key=True)
     site_name = Column(String(50))
 
-    def to_object(self):
-        """将 SQLAlchemy 模型转换为业务对象"""
-        from data_class import Site
-        return Site(
-            site_id=self.site_id,
-            site_name=self.site_name
-        )
+    # 对应的业务对象类（data_class 中的类名）及其字段，to_object 和批量加载都只用这些列
+    __business_class__ = 'Site'
+    __business_columns__ = ('site_id', 'site_name')
 
-class PipelineDB(Base):
+class PipelineDB(BusinessModel, Base):
     __tablename__ = 'pipeline' 
 
     pipe_id = Column(String(50), primary_key=True)
@@ -160,20 +129,13 @@ class PipelineDB(Base):
     pipe_shutdown_end_time = Column(DateTime) # 管道停输结束时间
     pipe_shutdown_reason = Column(String(50)) # 管道停输原因
 
-    def to_object(self):
-        """将 SQLAlchemy 模型转换为业务对象"""
-        from data_class import Pipeline
-        return Pipeline(
-            pipe_id=self.pipe_id,
-            pipe_name=self.pipe_name,
-            pipe_capacity_per_meter=self.pipe_capacity_per_meter,
-            pipe_shutdown_start_time=self.pipe_shutdown_start_time,
-            pipe_shutdown_end_time=self.pipe_shutdown_end_time,
-            pipe_shutdown_reason=self.pipe_shutdown_reason
-        )
+    # 对应的业务对象类（data_class 中的类名）及其字段，to_object 和批量加载都只用这些列
+    __business_class__ = 'Pipeline'
+    __business_columns__ = ('pipe_id', 'pipe_name', 'pipe_capacity_per_meter', 'pipe_shutdown_start_time',
+                            'pipe_shutdown_end_time', 'pipe_shutdown_reason')
 
 # 记录管道干线上站点的信息
-class BranchDB(Base):
+class BranchDB(BusinessModel, Base):
     __tablename__ = 'branch' 
 
     branch_id = Column(String(50), primary_key=True)
@@ -188,24 +150,13 @@ class BranchDB(Base):
     is_end = Column(String(10)) # 是否作为终点
     is_middle = Column(String(10)) # 是否中间站点
 
-    def to_object(self):
-        """将 SQLAlchemy 模型转换为业务对象"""
-        from data_class import Branch
-        return Branch(
-            branch_id=self.branch_id,
-            from_id=self.from_id,
-            to_id=self.to_id,
-            is_direct_connection=self.is_direct_connection,
-            branch_name=self.branch_name,
-            branch_mileage=self.branch_mileage,
-            branch_elevation=self.branch_elevation,
-            branch_capacity=self.branch_capacity,
-            is_begin=self.is_begin,
-            is_end=self.is_end,
-            is_middle=self.is_middle
-        )
+    # 对应的业务对象类（data_class 中的类名）及其字段，to_object 和批量加载都只用这些列
+    __business_class__ = 'Branch'
+    __business_columns__ = ('branch_id', 'from_id', 'to_id', 'is_direct_connection', 'branch_name',
+                            'branch_mileage', 'branch_elevation', 'branch_capacity', 'is_begin', 'is_end',
+                            'is_middle')
 
-class OilDB(Base):
+class OilDB(BusinessModel, Base):
     __tablename__ = 'oil'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -218,21 +169,10 @@ class OilDB(Base):
     place_of_origin = Column(String(50))
     transfer_way = Column(String(50))
 
-    def to_object(self):
-        """将 SQLAlchemy 模型转换为业务对象"""
-        from data_class import Oil
-        return Oil(
-            id=self.id,
-            oil_name=self.oil_name,
-            oil_id=self.oil_id,
-            p20=self.p20,
-            freezing_point=self.freezing_point,
-            h2s=self.h2s,
-            kinematic_viscosity=self.kinematic_viscosity,
-            place_of_origin=self.place_of_origin,
-            transfer_way=self.transfer_way
-        )
-
+    # 对应的业务对象类（data_class 中的类名）及其字段，to_object 和批量加载都只用这些列
+    __business_class__ = 'Oil'
+    __business_columns__ = ('id', 'oil_name', 'oil_id', 'p20', 'freezing_point', 'h2s', 'kinematic_viscosity',
+                            'place_of_origin', 'transfer_way')
 
 
 
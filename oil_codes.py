@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+油品编码 - 热路径上用整数比较代替字符串比较
+framework 与 state/scheduler 共用同一张编码表
+"""
+from typing import Dict, Optional
+
+OilCode = Dict[str, int]
+NO_OIL = -1  # 无油品（oil_type 为 None）
+
+OIL_CODES: OilCode = {}  # 油品名称 -> 整数编码，进程内全局唯一
+
+
+def oil_code(oil_type: Optional[str]) -> int:
+    """返回油品的整数编码，首次出现的油品分配新编码"""
+    if oil_type is None:
+        return NO_OIL
+    code = OIL_CODES.get(oil_type)
+    if code is None:
+        code = OIL_CODES[oil_type] = len(OIL_CODES)
+    return code
@@ -1,10 +1,15 @@
 from abc import ABC, abstractmethod
 from copy import deepcopy
-from typing import List, Dict, Tuple, Optional, Any
+from typing import List, Dict, Tuple, Optional, Any, Iterator, Deque
 import time
 import math
+from itertools import chain
+from operator import attrgetter
+import numpy as np
 from state import State
-from data_class import CustomerOrder, DispatchOrder
+from oil_codes import NO_OIL, oil_code
+from _scoring import score_path
+from data_class import CustomerOrder, DispatchOrder, Tank
 from dispatch_order_queue import DispatchOrderQueueManager
 import logging
 
@@ -15,24 +20,14 @@ class PathScoring:
     def calculate_score(self, path: List[str], oil_type: str, start_time: int, 
                        state: State, quantity: float) -> float:
         """简单评分：优先选择无需清洗的路径"""
-        score = 0.0
-        
-        for pipeline_id in path:
-            pipeline = state.pipelines[pipeline_id]
-            # 无需清洗的路径优先
-            if pipeline.current_oil == oil_type:
-                score += 100
-            elif pipeline.current_oil is not None:
-                score -= 80  # 需要清洗
-        
-        # 考虑管线容量
-        min_capacity = min(state.pipelines[pid].capacity for pid in path)
-        if quantity <= min_capacity:
-            score += 20
-        else:
-            score -= 30
-            
-        return score
+        # 路径中还有油罐、分支和 LOCAL/DIRECT 标记，只取其中的管线
+        state_pipelines = state.pipelines
+        pipelines = [state_pipelines[pipeline_id] for pipeline_id in path if pipeline_id in state_pipelines]
+        path_oil_codes = np.fromiter((oil_code(p.current_oil) for p in pipelines),
+                                     dtype=np.int32, count=len(pipelines))
+        path_caps = np.fromiter((p.capacity for p in pipelines),
+                                dtype=np.float64, count=len(pipelines))
+        return float(score_path(path_oil_codes, path_caps, oil_code(oil_type), quantity))
 
 class Scheduler:
     """简化版调度器，专注于订单拆分、路径搜索和状态更新"""
@@ -43,9 +38,13 @@ class Scheduler:
         Args:
             min_batch_size: 最小批次大小(吨)
         """
-        self.path_scoring = PathScoring()
-        self.min_batch_size = min_batch_size
-        self.failed_orders = []  # 记录失败的订单
+        self.path_scoring: PathScoring = PathScoring()
+        self.min_batch_size: float = min_batch_size
+        self.failed_orders: List[CustomerOrder] = []  # 记录失败的订单
+        # (源油罐ID, 目标油罐ID, 拓扑版本号) -> 路径列表
+        self._path_cache: Dict[Tuple[str, str, int], List[List[str]]] = {}
+        # (源油罐ID, 目标油罐ID, 拓扑版本号) -> 首条路径（无路径时为 None）
+        self._first_path_cache: Dict[Tuple[str, str, int], Optional[List[str]]] = {}
 
     def split_order(self, order: CustomerOrder) -> List[DispatchOrder]:
         """将订单拆分为两个调度工单
@@ -59,74 +58,19 @@ class Scheduler:
         # 检查是否需要拆分
         if order.undispatched_volume <= self.min_batch_size * 2:
             # 如果订单太小，不拆分，只创建一个调度工单
-            single_dispatch = DispatchOrder(
-                dispatch_order_id=str(order.customer_order_id) + "_01",
-                customer_order_id=order.customer_order_id,
-                site_id=order.site_id,
-                oil_type=order.oil_type,
-                required_volume=order.undispatched_volume,
-                status="DRAFT"
-            )
-            return [single_dispatch]
+            return [DispatchOrder.from_customer_order(order, "_01", order.undispatched_volume)]
         
         # 简单拆分：50%-50%
         first_quantity = order.undispatched_volume / 2
         second_quantity = order.undispatched_volume - first_quantity
         
-        # 创建第一个调度工单
-        first_dispatch = DispatchOrder(
-            dispatch_order_id=str(order.customer_order_id) + "_01",
-            customer_order_id=order.customer_order_id,
-            site_id=order.site_id,
-            oil_type=order.oil_type,
-            required_volume=first_quantity,
-            status="DRAFT"
-        )
-        
-        # 创建第二个调度工单
-        second_dispatch = DispatchOrder(
-            dispatch_order_id=str(order.customer_order_id) + "_02",
-            customer_order_id=order.customer_order_id,
-            site_id=order.site_id,
-            oil_type=order.oil_type,
-            required_volume=second_quantity,
-            status="DRAFT"
-        )
+        # 创建两个调度工单
+        first_dispatch = DispatchOrder.from_customer_order(order, "_01", first_quantity)
+        second_dispatch = DispatchOrder.from_customer_order(order, "_02", second_quantity)
         
         return [first_dispatch, second_dispatch]
 
-    # def split_order(self, order: CustomerOrder) -> List[CustomerOrder]:
-    #     """将订单拆分为两个子订单
-    #     
-    #     Args:
-    #         order: 原始订单
-    #         
-    #     Returns:
-    #         拆分后的子订单列表
-    #     """
-    #     if order.undispatched_volume <= self.min_batch_size * 2:
-    #         # 如果订单太小，不拆分
-    #         return [order]
-    #     
-    #     # 简单拆分：50%-50%
-    #     first_quantity = order.undispatched_volume / 2
-    #     second_quantity = order.undispatched_volume - first_quantity
-    #     
-    #     # 创建第一个子订单
-    #     first_order = deepcopy(order)
-    #     first_order.undispatched_volume = first_quantity
-    #     first_order.customer_order_id = order.customer_order_id
-    #     first_order. = f"{order.id}_part1"
-    #     
-    #     # 创建第二个子订单
-    #     second_order = deepcopy(order)
-    #     second_order.remaining_quantity = second_quantity
-    #     second_order.original_order_id = order.id
-    #     second_order.id = f"{order.id}_part2"
-    #     
-    #     return [first_order, second_order]
-
-    def _get_all_paths(self, source_tank_id: str, target_tank_id: str, state: State):
+    def _get_all_paths(self, source_tank_id: str, target_tank_id: str, state: State) -> List[List[str]]:
         """
         获取从源油罐到目标油罐的所有可能路径
         
@@ -142,40 +86,59 @@ class Scheduler:
         Returns:
             所有可能路径的列表 [source_tank_id, pipeline_id, branch_id, target_tank_id]
         """
+        # 管网拓扑在调度过程中不变，按拓扑版本号缓存路径（不同 State 的版本号不同）
+        key = (source_tank_id, target_tank_id, state.topology_version)
+        paths = self._path_cache.get(key)
+        if paths is None:
+            paths = self._path_cache[key] = self._search_all_paths(source_tank_id, target_tank_id, state)
+        return paths
+    
+    def _get_first_path(self, source_tank_id: str, target_tank_id: str, state: State) -> Optional[List[str]]:
+        """获取优先级最高的一条路径，找到即停止搜索，不展开全部组合"""
+        key = (source_tank_id, target_tank_id, state.topology_version)
+        if key in self._first_path_cache:
+            path = self._first_path_cache[key]
+        else:
+            paths = self._path_cache.get(key)
+            if paths is not None:
+                path = paths[0] if paths else None
+            else:
+                path = next(self._iter_all_paths(source_tank_id, target_tank_id, state), None)
+            self._first_path_cache[key] = path
+        # 缓存中的路径在多个工单间共享，返回副本
+        return None if path is None else list(path)
+    
+    def _search_all_paths(self, source_tank_id: str, target_tank_id: str, state: State) -> List[List[str]]:
+        """在管网中搜索从源油罐到目标油罐的所有路径（未缓存），没有路径时返回空列表"""
+        return list(self._iter_all_paths(source_tank_id, target_tank_id, state))
+    
+    def _iter_all_paths(self, source_tank_id: str, target_tank_id: str, state: State) -> Iterator[List[str]]:
+        """按优先顺序逐条生成从源油罐到目标油罐的路径，全部生成完仍没有路径时打印警告"""
         # 检查源油罐和目标油罐是否存在
         if source_tank_id not in state.tanks or target_tank_id not in state.tanks:
             print(f"警告：源油罐 {source_tank_id} 或目标油罐 {target_tank_id} 不存在")
-            return []
+            return
         
         source_tank = state.tanks[source_tank_id]
         target_tank = state.tanks[target_tank_id]
-        source_site_id = source_tank.site_id
-        target_site_id = target_tank.site_id
-        
-        paths = [] # [source_tank_id, pipeline_id, branch_id, target_tank_id]
         
         # 情况1: 源油罐和目标油罐在同一站点
-        if source_site_id == target_site_id:
-            path = [source_tank.tank_id, "LOCAL", "LOCAL", "LOCAL", target_tank.tank_id]
-            paths.append(path)
-            return paths
+        if source_tank.site_id == target_tank.site_id:
+            yield [source_tank.tank_id, "LOCAL", "LOCAL", "LOCAL", target_tank.tank_id]
+            return
         
         # 情况2: 源油罐和目标油罐在不同站点
-        # 先尝试查找通过主管道的路径
-        pipeline_paths = self._get_pipeline_paths(source_tank, target_tank, state)
-        paths.extend(pipeline_paths)
-        
-        # 再尝试查找直接通过分支的路径（不经过主管道）
-        direct_branch_paths = self._get_direct_branch_paths(source_tank, target_tank, state)
-        paths.extend(direct_branch_paths)
-        
-        # 如果没有找到任何路径，返回空列表
-        if not paths:
-            print(f"警告：未找到从站点 {source_site_id} 到站点 {target_site_id} 的有效路径")
-        
-        return paths
+        # 先尝试查找通过主管道的路径，再尝试查找直接通过分支的路径（不经过主管道）
+        found = False
+        for path in chain(self._get_pipeline_paths(source_tank, target_tank, state),
+                          self._get_direct_branch_paths(source_tank, target_tank, state)):
+            found = True
+            yield path
+        
+        if not found:
+            print(f"警告：未找到从站点 {source_tank.site_id} 到站点 {target_tank.site_id} 的有效路径")
     
-    def _get_pipeline_paths(self, source_tank, target_tank, state: State):
+    def _get_pipeline_paths(self, source_tank: Tank, target_tank: Tank, state: State) -> Iterator[List[str]]:
         """
         根据source_tank，找到从tank到source site的branch，找到从site到pipeline的branch，
         然后根据target tank，找到从pipeline到target site的branch，从target site 到tank的branch，
@@ -186,73 +149,41 @@ class Scheduler:
             target_tank: 目标油罐对象
             state: 调度状态对象
     
-        Returns:
-            List[List[str]]: 路径列表，每条路径格式为 [source_tank_id, branch_id, pipeline_id, branch_id, target_tank_id]
+        Yields:
+            List[str]: 路径，格式为 [source_tank_id, branch_id, pipeline_id, branch_id, target_tank_id]
         """
-        paths = []
-        
-        # 获取源站点和目标站点ID
+        # State 构建时已将站点ID规范为驻留字符串
         source_site_id = source_tank.site_id
         target_site_id = target_tank.site_id
         
-        
-        # 步骤1: 找到从source_tank到source_site的branch
-        source_branches = []
-        for branch in state.branches.values():
-            # 查找连接到源站点的分支，from_id为tank_id，to_id为site_id
-            if branch.to_id == str(source_site_id) and branch.from_id == source_tank.tank_id:
-                source_branches.append(branch)
-        
-        # 步骤2: 找到从source_site到pipeline的branch
-        source_site_to_pipeline_branches = []
-        for branch in state.branches.values():
-            # 查找连接源站点到主管道的分支，from_id为site_id，to_id为pipe_id
-            if branch.from_id == str(source_site_id) and branch.to_id in state.pipelines:
-                source_site_to_pipeline_branches.append(branch)
-        
-        # 步骤3: 找到从pipeline到target_site的branch
-        pipeline_to_target_site_branches = []
-        for branch in state.branches.values():
-            # 查找连接主管道到目标站点的分支，from_id为pipe_id，to_id为site_id
-            if branch.to_id == str(target_site_id) and branch.from_id in state.pipelines:
-                pipeline_to_target_site_branches.append(branch)
-        
-        # 步骤4: 找到从target_site到target_tank的branch
-        target_branches = []
-        for branch in state.branches.values():
-            # 查找连接目标站点到目标油罐的分支，from_id为site_id，to_id为tank_id
-            if branch.from_id == str(target_site_id) and branch.to_id == target_tank.tank_id:
-                target_branches.append(branch)
-        
-        # 构建完整路径
-        for source_branch in source_branches:
-            for source_site_to_pipe_branch in source_site_to_pipeline_branches:
-                # 确保源站点到主管道的分支与源站点一致
-                if source_site_to_pipe_branch.from_id == source_site_id:
-                    # 找到共同的主管道
-                    pipe_id = source_site_to_pipe_branch.to_id
-                    
-                    for pipe_to_target_site_branch in pipeline_to_target_site_branches:
-                        # 确保主管道一致
-                        if pipe_to_target_site_branch.from_id == pipe_id:
-                            for target_branch in target_branches:
-                                # 确保目标站点一致
-                                if target_branch.from_id == target_site_id:
-                                    # 构建完整路径
-                                    path = [
-                                        source_tank.tank_id,
-                                        source_branch.branch_id,
-                                        pipe_id,
-                                        pipe_to_target_site_branch.branch_id,
-                                        target_tank.tank_id
-                                    ]
-                                    paths.append(path)
-        
-        return paths
-    
-
-
-    def _get_direct_branch_paths(self, source_tank, target_tank, state: State) -> List[List[str]]:
+        # 步骤1: 找到从source_tank到source_site的branch（from_id为tank_id，to_id为site_id）
+        source_branches = state.branches_from_tank.get((source_tank.tank_id, source_site_id))
+        
+        # 步骤4: 找到从target_site到target_tank的branch（from_id为site_id，to_id为tank_id）
+        target_branches = state.branches_from_site_to_tank.get((target_site_id, target_tank.tank_id))
+        
+        # 两端任一缺失时不可能构成路径
+        if not source_branches or not target_branches:
+            return
+        
+        # 步骤2: 找到从source_site到pipeline的branch（from_id为site_id，to_id为pipe_id）
+        source_site_to_pipeline_branches = state.branches_from_site_to_pipe.get(source_site_id, ())
+        
+        # 构建完整路径（分支以 (from_id, to_id, branch_id) 元组表示）
+        for _, _, source_branch_id in source_branches:
+            for _, pipe_id, _ in source_site_to_pipeline_branches:
+                # 步骤3: 找到从该pipeline到target_site的branch
+                for _, _, pipe_to_site_branch_id in state.branches_from_pipe_to_site.get((pipe_id, target_site_id), ()):
+                    for _ in target_branches:
+                        yield [
+                            source_tank.tank_id,
+                            source_branch_id,
+                            pipe_id,
+                            pipe_to_site_branch_id,
+                            target_tank.tank_id
+                        ]
+
+    def _get_direct_branch_paths(self, source_tank: Tank, target_tank: Tank, state: State) -> Iterator[List[str]]:
         """
         获取直接连接源油罐和目标油罐的分支路径
         
@@ -261,65 +192,48 @@ class Scheduler:
             target_tank: 目标油罐对象
             state: 调度状态对象
             
-        Returns:
-            List[List[str]]: 直接分支路径列表，每条路径格式为 [source_tank_id, branch_id, target_tank_id]
+        Yields:
+            List[str]: 直接分支路径，格式为 [source_tank_id, branch_id, "DIRECT", branch_id, target_tank_id]
         """
-        paths = []
-        
-        # 在所有分支中寻找 from_id 为 source_tank_id, to_id 为 target_tank_id 的分支
-        for branch in state.branches.values():
-            if branch.from_id == source_tank.tank_id and branch.to_id == target_tank.tank_id:
-                # 构建直接路径
-                path = [
-                    source_tank.tank_id,
-                    branch.branch_id,
-                    "DIRECT",
-                    branch.branch_id,
-                    target_tank.tank_id
-                ]
-                paths.append(path)
-        
-        return paths
+        # 查找 from_id 为 source_tank_id, to_id 为 target_tank_id 的分支
+        for _, _, branch_id in state.branches_tank_to_tank.get((source_tank.tank_id, target_tank.tank_id), ()):
+            yield [
+                source_tank.tank_id,
+                branch_id,
+                "DIRECT",
+                branch_id,
+                target_tank.tank_id
+            ]
 
     def _check_capacity(self, path: List[str], quantity: float, start_time: int, state: State) -> bool:
         """检查路径容量是否满足需求"""
-        for pipeline_id in path:
-            pipeline = state.pipelines[pipeline_id]
-            if quantity > pipeline.capacity:
-                return False
-        return True
+        # 路径形如 [源油罐, 分支, 主管道, 分支, 目标油罐]，与 calculate_duration 一样只看 path[2]
+        pipeline = state.pipelines.get(path[2])
+        return pipeline is None or quantity <= pipeline.capacity
 
     def _check_time_conflict(self, path: List[str], quantity: float, start_time: int, state: State) -> bool:
         """检查时间冲突"""
         duration = self.calculate_duration(quantity, path, state)
         end_time = start_time + int(duration * 3600)  # 小时转换为秒
         
+        pipelines = state.pipelines
         for pipeline_id in path:
-            pipeline = state.pipelines[pipeline_id]
-            for occ_start, occ_end, _, _ in pipeline.occupancy_schedule:
-                if not (end_time <= occ_start or start_time >= occ_end):
-                    return False  # 时间冲突
+            if pipelines[pipeline_id].has_time_conflict(start_time, end_time):
+                return False  # 时间冲突
         return True
 
     def calculate_duration(self, quantity: float, path: List[str], state: State) -> float:
         """计算输送时间（小时）"""
-        min_capacity = float('inf')
-        # for pipeline_id in path:
-        #     pipeline = state.pipelines[pipeline_id]
-        #     if pipeline.capacity < min_capacity:
-        #         min_capacity = pipeline.capacity
-
-        if path[2] == 'LOCAL':
+        # 输送能力取路径中间的主管道（path[2]）
+        pipe_id = path[2]
+        if pipe_id == 'LOCAL':
             return 0
 
-        pipeline = state.pipelines[path[2]]  # 中间的pipeline_id    
-        if pipeline.pipe_capacity_per_meter < min_capacity:
-            min_capacity = pipeline.pipe_capacity_per_meter * 100
-    
-        if min_capacity <= 0:
+        capacity = state.pipelines[pipe_id].capacity
+        if capacity <= 0:
             return float('inf')
         
-        return quantity / min_capacity
+        return quantity / capacity
 
     def calculate_wash_time(self, pipeline_ids: List[str], state: State) -> float:
         """计算清洗时间（小时）"""
@@ -393,11 +307,15 @@ class Scheduler:
     #     return dispatch_order
 
 
-    def schedule_dispatch_order(self, dispatch_order: DispatchOrder, queue: DispatchOrderQueueManager, current_time) -> Optional[DispatchOrder]:
+    def schedule_dispatch_order(self, dispatch_order: DispatchOrder, queue: DispatchOrderQueueManager,
+                                current_time: int) -> Optional[Tuple[DispatchOrder, int]]:
         """调度单个调度工单，找到合适的源油罐、目标油罐和运输路径，并更新状态"""
 
         # 1. 为调度工单找到合适的source-tank（从哪个油罐出油）
         state = queue.get_order_state_last()
+        if state is None:
+            print(f"调度工单 {dispatch_order.dispatch_order_id} 没有可用的调度状态")
+            return None
         source_tank_id = self._find_best_source_tank(dispatch_order, state)
         if not source_tank_id:
             print(f"找不到合适的源油罐，油品类型: {dispatch_order.oil_type}, 需要体积: {dispatch_order.required_volume}")
@@ -461,117 +379,84 @@ class Scheduler:
 
     def _find_best_target_tank(self, dispatch_order: DispatchOrder, state: State) -> Optional[str]:
         """根据dispatch_order的目标站点ID，在该站点的所有油罐中查找最适合存放的油罐"""
+        arrays = state.tank_arrays()
+        target_oil = oil_code(dispatch_order.oil_type)
         
-        target_site_id = dispatch_order.site_id
-        available_site_tanks = []
-        for tank_id, tank in state.tanks.items():
-            if tank.site_id == target_site_id:
-                # 检查油罐状态是否可用
-                if tank.status != "AVAILABLE":
-                    continue
-                    
-                # 检查油品兼容性
-                if tank.oil_type != dispatch_order.oil_type and tank.oil_type is not None:
-                    # 检查是否兼容（简化：假定可以转换，但可能需要清洗）
-                    continue
-                    
-                # 检查容量是否足够
-                available_capacity = tank.safe_tank_capacity - tank.inventory
-                if available_capacity < dispatch_order.required_volume:
-                    continue
-
-                available_site_tanks.append(tank)
-        # 在目标站点的油罐中查找最适合的油罐
-        best_tank_id = None
-        best_score = -float('inf')
+        # 静态筛选（按站点、油品缓存）：油罐可用、油品相同或空罐（不同油品简化为不可用）
+        rows = arrays.eligible_target_rows(dispatch_order.site_id, target_oil)
+        if rows is None:
+            return None
         
-        for tank in available_site_tanks:
-            # tank = state.tanks[tank_id]
-            
-                            
-            # 评分：同油品优先，容量余量适中的优先
-            score = 0
-            if tank.oil_type == dispatch_order.oil_type:
-                score += 100  # 同油品无清洗
-            elif tank.oil_type is None:
-                score += 50  # 空罐
-            else:
-                score -= 20  # 需要清洗
-                
-            # 容量利用率评分（避免过度填充）
-            if tank.safe_tank_capacity > 0:
-                target_inventory = tank.inventory + dispatch_order.required_volume
-                capacity_utilization = min(target_inventory / tank.safe_tank_capacity, 1.0) * 30
-                score += capacity_utilization
-                
-            # 避免液位过高
-            if tank.safe_tank_capacity > 0:
-                target_level = (tank.current_level * tank.safe_tank_capacity + 
-                               dispatch_order.required_volume) / tank.safe_tank_capacity
-                if target_level >= tank.safe_tank_level * 0.9:
-                    score -= 50
-                elif target_level >= tank.safe_tank_level * 0.8:
-                    score -= 20
-                
-            if score > best_score:
-                best_score = score
-                best_tank_id = tank.tank_id
-        
-        return best_tank_id
+        # 动态筛选：容量足够
+        required_volume = dispatch_order.required_volume
+        inventory = arrays.inventory[rows]
+        safe_capacity = arrays.safe_capacity[rows]
+        mask = safe_capacity - inventory >= required_volume
+        if not mask.any():
+            return None
+        rows = rows[mask]
+        inventory = inventory[mask]
+        safe_capacity = safe_capacity[mask]
+        tank_oil = arrays.oil_code[rows]
+        
+        # 评分：同油品优先，容量余量适中的优先
+        score = np.where(tank_oil == target_oil, 100.0, np.where(tank_oil == NO_OIL, 50.0, -20.0))
+        has_capacity = safe_capacity > 0
+        divisor = np.where(has_capacity, safe_capacity, 1.0)
+        
+        # 容量利用率评分（避免过度填充）
+        capacity_utilization = np.minimum((inventory + required_volume) / divisor, 1.0) * 30
+        score = score + np.where(has_capacity, capacity_utilization, 0.0)
+        
+        # 避免液位过高
+        target_level = (arrays.current_level[rows] * divisor + required_volume) / divisor
+        safe_level = arrays.safe_level[rows]
+        penalty = np.where(target_level >= safe_level * 0.9, 50.0,
+                           np.where(target_level >= safe_level * 0.8, 20.0, 0.0))
+        score = score - np.where(has_capacity, penalty, 0.0)
+        
+        # 同分时取靠前的油罐
+        return arrays.ids[rows[np.argmax(score)]]
 
     def _find_best_source_tank(self, dispatch_order: DispatchOrder, state: State) -> Optional[str]:
         """查找最佳源油罐"""
-        oil_type = dispatch_order.oil_type
+        arrays = state.tank_arrays()
+        target_oil = oil_code(dispatch_order.oil_type)
+        
+        # 静态筛选（按油品缓存）：源油罐、油罐可用、油品相同或空罐（不同油品简化为不可用）
+        rows = arrays.eligible_source_rows(target_oil)
+        
+        # 动态筛选：可用库存足够
         required_volume = dispatch_order.required_volume
-        best_tank_id = None
-        best_score = -float('inf')
+        inventory = arrays.inventory[rows]
+        mask = inventory - arrays.min_safe_level[rows] >= required_volume
+        if not mask.any():
+            return None
+        rows = rows[mask]
+        inventory = inventory[mask]
+        tank_oil = arrays.oil_code[rows]
         
-        for tank_id, tank in state.tanks.items():
-            if not "SOURCE" in tank.tank_type:
-                continue
-
-            # 检查油罐状态是否可用
-            if tank.status != "AVAILABLE":
-                continue
-                
-            # 检查油品兼容性
-            if tank.oil_type != oil_type and tank.oil_type is not None:
-                # 检查是否兼容（简化：假定可以转换，但可能需要清洗）
-                continue
-                
-            # 检查可用库存
-            available_inventory = tank.inventory - tank.min_safe_level
-            if available_inventory < required_volume:
-                continue
-                
-            # 评分：同油品优先，库存多的优先，避免低液位
-            score = 0
-            if tank.oil_type == oil_type:
-                score += 100  # 同油品无清洗
-            elif tank.oil_type is None:
-                score += 50  # 空罐
-            else:
-                score -= 20  # 需要清洗
-                
-            # 库存利用率评分
-            if tank.safe_tank_capacity > 0:
-                inventory_utilization = (tank.inventory / tank.safe_tank_capacity) * 30
-                score += inventory_utilization
-                
-            # 避免液位过低
-            if tank.current_level <= tank.safe_tank_level:
-                score -= 50
-            elif tank.current_level <= tank.safe_tank_level * 0.3:
-                score -= 30
-                
-            if score > best_score:
-                best_score = score
-                best_tank_id = tank_id
-        
-        return best_tank_id
+        # 评分：同油品优先，库存多的优先，避免低液位
+        score = np.where(tank_oil == target_oil, 100.0, np.where(tank_oil == NO_OIL, 50.0, -20.0))
+        
+        # 库存利用率评分
+        safe_capacity = arrays.safe_capacity[rows]
+        has_capacity = safe_capacity > 0
+        inventory_utilization = inventory / np.where(has_capacity, safe_capacity, 1.0) * 30
+        score = score + np.where(has_capacity, inventory_utilization, 0.0)
+        
+        # 避免液位过低
+        current_level = arrays.current_level[rows]
+        safe_level = arrays.safe_level[rows]
+        penalty = np.where(current_level <= safe_level, 50.0,
+                           np.where(current_level <= safe_level * 0.3, 30.0, 0.0))
+        score = score - penalty
+        
+        # 同分时取靠前的油罐
+        return arrays.ids[rows[np.argmax(score)]]
 
     def _find_feasible_path(self, source_tank_id: str, target_tank_id: str,
-                            dispatch_order: DispatchOrder, state: State):
+                            dispatch_order: DispatchOrder, state: State) -> Optional[List[str]]:
         """寻找可行路径
         
         Args:
@@ -583,12 +468,12 @@ class Scheduler:
             state: 调度状态
             
         Returns:
-            (路径, 评分, 失败原因) 或 None
+            路径，没有路径时返回 None
         """
-        # 获取所有可能路径
-        possible_paths = self._get_all_paths(source_tank_id, target_tank_id, state)
-        if not possible_paths:
-            return None, -float('inf'), "NO_PATH_AVAILABLE"
+        # 只取首条路径，惰性生成，无需展开全部组合
+        path = self._get_first_path(source_tank_id, target_tank_id, state)
+        if path is None:
+            return None
         
         # # 为每条路径评分
         # scored_paths = []
@@ -616,14 +501,15 @@ class Scheduler:
         # # 选择最高分路径
         # best_path = max(scored_paths, key=lambda x: x[1])
         # return best_path[0], best_path[1], "SUCCESS"
-        return possible_paths[0]
+        return path
 
 
-    def update_state(self, state: State, dispatch_order: DispatchOrder):
+    def update_state(self, state: State, dispatch_order: DispatchOrder) -> None:
         """更新状态"""
         # 1. 更新源油罐
-        source_tank = state.tanks[dispatch_order.source_tank_id]
+        source_tank = state.own_tank(dispatch_order.source_tank_id)
         source_tank.inventory -= dispatch_order.required_volume
+        state.refresh_tank_arrays([dispatch_order.source_tank_id])
         
         # 如果油罐变空，重置油品类型
         # if source_tank.current_level <= source_tank.safety_min + 0.1:
@@ -638,18 +524,18 @@ class Scheduler:
         # source_tank.occupied_until = max(source_tank.occupied_until, dispatch_order.end_time)
         
         # 2. 更新管线
-        for pipeline_id in dispatch_order.pipeline_path:
-            pipeline = state.pipelines[pipeline_id]
+        for pipeline_id in dispatch_order.pipeline_path or ():
+            pipeline = state.own_pipeline(pipeline_id)
             
             # 更新当前油品
             pipeline.current_oil = dispatch_order.oil_type
             
-            # 添加占用计划
-            pipeline.occupancy_schedule.append((
+            # 添加占用计划（按开始时间有序插入）
+            pipeline.add_occupancy((
                 dispatch_order.start_time,
                 dispatch_order.end_time,
                 dispatch_order.oil_type,
-                dispatch_order.quantity
+                dispatch_order.required_volume
             ))
             
             # 如果需要清洗，记录清洗时间
@@ -663,34 +549,37 @@ class Scheduler:
 
 
 
-    def schedule_order(self, order: CustomerOrder, queue: DispatchOrderQueueManager, start_time) -> List[DispatchOrder]:
+    def schedule_order(self, order: CustomerOrder, queue: DispatchOrderQueueManager,
+                       start_time: int) -> Tuple[List[DispatchOrder], int]:
         """
         调度单个订单（兼容旧接口）
         
         Args:
             order: 要调度的客户订单
-            state: 当前调度状态
+            queue: 调度工单队列管理器
+            start_time: 第一个工单的最早开始时间（秒）
             
         Returns:
-            生成的调度工单列表
+            (调度成功的工单列表, 最后一个工单的结束时间)
         """
-        dispatch_orders = []
+        dispatch_orders: List[DispatchOrder] = []
         undispatched_volume = order.undispatched_volume
+        start_time = int(start_time)
         
         # 1. 如果订单已完成，直接返回空列表
         if order.is_fully_scheduled():
-            return dispatch_orders
+            return dispatch_orders, start_time
         
-        # 2. 尝试拆分订单
-        dispatch_orders = self.split_order(order)
-        
-        # 3. 为每个子订单生成调度
-        start_time = int(start_time)
-        for o in dispatch_orders:
+        # 2. 拆分订单，3. 为每个子订单生成调度
+        for o in self.split_order(order):
             # 调度单个批次
             # dispatch_order = self.schedule_dispatch_order(o, queue)
-            dispatch_order, end_time = self.schedule_dispatch_order(o, queue, start_time)
-            start_time = end_time 
+            result = self.schedule_dispatch_order(o, queue, start_time)
+            if result is None:
+                # 后续批次依赖前一批次的状态，失败后不再继续
+                break
+            dispatch_order, start_time = result
+            dispatch_orders.append(dispatch_order)
             # if dispatch_order:
             #     # 更新状态
             #     self.update_state(queue.get_order_state_last(), dispatch_order)
@@ -724,31 +613,34 @@ class Scheduler:
         
         return dispatch_orders, start_time
     
-    def rolling_schedule(self, orders: List[CustomerOrder], queue:DispatchOrderQueueManager) -> Tuple[List[DispatchOrder], List[CustomerOrder]]:
+    def rolling_schedule(self, orders: List[CustomerOrder], queue: DispatchOrderQueueManager) -> Deque[DispatchOrder]:
         """滚动调度多个订单
         
         Args:
             orders: 订单列表
-            state: 调度状态
+            queue: 调度工单队列管理器
             
         Returns:
-            (调度成功的工单列表, 未调度的订单列表)
+            调度工单队列
         """
         all_dispatch_orders = []
         unscheduled_orders = []
         
-        # 按优先级排序订单
-        sorted_orders = sorted(orders, key=lambda x: x.priority, reverse=True)
+        # 过滤已完成的订单，按优先级排序
+        pending_orders = [order for order in orders if not order.is_fully_scheduled()]
+        sorted_orders = sorted(pending_orders, key=attrgetter('priority'), reverse=True)
 
         start_time = int(time.time()) 
         for order in sorted_orders:
-            if order.is_fully_scheduled():
-                continue
-                
             # 调用单个订单调度函数
             dispatch_orders, end_time = self.schedule_order(order, queue, start_time)
             start_time = end_time 
             
+            # 每个订单调度完后压平最新状态的增量层，后续派生的状态只需查找两层
+            last_state = queue.get_order_state_last()
+            if last_state is not None:
+                last_state.materialize()
+            
             if dispatch_orders:
                 # 添加到成功调度的工单列表
                 all_dispatch_orders.extend(dispatch_orders)
@@ -1,11 +1,280 @@
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterable, Mapping, MutableMapping
+from collections import ChainMap
+from functools import lru_cache
 from datetime import datetime
-from data_class import Tank, Pipeline, Branch
+from operator import attrgetter
+from types import MappingProxyType
+from data_class import Tank, Pipeline, Branch, TANK_SOURCE
+from oil_codes import NO_OIL, oil_code
 from copy import deepcopy
+import sys
+import json
+import pickle
+import heapq
+import itertools
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson，serialize_bytes 退回标准库 json
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgspec  # type: ignore[import-not-found]
+except ImportError:  # 未安装 msgspec，serialize_bytes 使用 orjson 或标准库 json
+    msgspec = None
+
+try:
+    from ciso8601 import parse_datetime as _parse_iso_fast  # type: ignore[import-not-found]
+except ImportError:  # 未安装 ciso8601，反序列化退回标准库解析
+    _parse_iso_fast = datetime.fromisoformat
+
+_TOPOLOGY_VERSIONS = itertools.count(1)  # 拓扑版本号分配器，每次建立分支索引取一个新值，进程内不重复
+
+_MAX_DELTA_DEPTH = 32  # 增量层数上限，超过后压平为单个字典
+
+
+def _shared_layers(mapping: MutableMapping) -> list:
+    """把 mapping 的非空层冻结为共享层（层数超限时压平）"""
+    maps = mapping.maps if isinstance(mapping, ChainMap) else [mapping]
+    maps = [m for m in maps if m]
+    if len(maps) >= _MAX_DELTA_DEPTH:
+        maps = [dict(ChainMap(*maps))]
+    return maps
+
+
+@lru_cache(maxsize=8192)
+def _parse_iso(value: str) -> datetime:
+    """解析 ISO 时间字符串（按字符串缓存，占用计划中同一时间串反复出现，只解析一次）"""
+    if value.endswith('Z'):  # 标准库在 3.11 之前不接受 'Z' 后缀
+        value = value[:-1] + '+00:00'
+    return _parse_iso_fast(value)
+
+
+_ISO_CACHE_SIZE = 8192  # 序列化缓存上限，超过后整体清空
+_ISO_CACHE: Dict[datetime, str] = {}  # 无时区 datetime -> ISO 字符串
+_OCCUPANCY_ISO_CACHE: Dict[tuple, tuple] = {}  # 占用记录 -> 序列化后的记录
+
+
+def _iso(dt: datetime) -> str:
+    """datetime 转 ISO 字符串；带时区的值相等不代表偏移相同，只缓存无时区的值"""
+    if dt.tzinfo is not None:
+        return dt.isoformat()
+    text = _ISO_CACHE.get(dt)
+    if text is None:
+        if len(_ISO_CACHE) >= _ISO_CACHE_SIZE:
+            _ISO_CACHE.clear()
+        text = _ISO_CACHE[dt] = dt.isoformat()
+    return text
+
+
+def _serialize_occupancy(s: tuple) -> tuple:
+    """序列化一条占用记录 (start, end, oil, volume, source, target, order_id)"""
+    if s[0].tzinfo is not None or s[1].tzinfo is not None:
+        return (s[0].isoformat(), s[1].isoformat(), s[2], s[3], s[4], s[5], s[6])
+    result = _OCCUPANCY_ISO_CACHE.get(s)
+    if result is None:
+        if len(_OCCUPANCY_ISO_CACHE) >= _ISO_CACHE_SIZE:
+            _OCCUPANCY_ISO_CACHE.clear()
+        result = _OCCUPANCY_ISO_CACHE[s] = (_iso(s[0]), _iso(s[1]), s[2], s[3], s[4], s[5], s[6])
+    return result
+
+
+# serialize_bytes 按字段名批量读取属性
+_TANK_FIELDS = ('tank_id', 'site_id', 'tank_name', 'tank_area', 'oil_type', 'inventory', 'current_level',
+                'tank_capacity_per_meter', 'maximum_tank_capacity', 'safe_tank_capacity',
+                'maximum_tank_level', 'safe_tank_level', 'min_safe_level', 'tank_type', 'status')
+_PIPELINE_FIELDS = ('pipe_id', 'pipe_name', 'pipe_capacity_per_meter', 'pipe_shutdown_start_time',
+                    'pipe_shutdown_end_time', 'pipe_shutdown_reason')
+_BRANCH_FIELDS = ('branch_id', 'from_id', 'to_id', 'is_direct_connection', 'branch_name', 'branch_mileage',
+                  'branch_elevation', 'branch_capacity', 'is_begin', 'is_end', 'is_middle')
+_get_tank_fields = attrgetter(*_TANK_FIELDS)
+_get_pipeline_fields = attrgetter(*_PIPELINE_FIELDS)
+_get_branch_fields = attrgetter(*_BRANCH_FIELDS)
+
+
+def _json_default(value):
+    """标准库 json 的兜底编码：datetime 输出 ISO 字符串"""
+    if isinstance(value, datetime):
+        return _iso(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"无法序列化类型 {type(value).__name__}")
+
+
+def _read_order_data(order_data: Dict[str, Any]) -> tuple:
+    """
+    读取 apply_dispatch_order 用到的工单字段
+    
+    Returns:
+        (source_tank_id, target_tank_id, required_volume, oil_type, pipeline_path)
+    """
+    return (order_data.get('source_tank_id', ''),
+            order_data.get('target_tank_id', ''),
+            order_data.get('required_volume', 0.0),
+            order_data.get('oil_type', ''),
+            order_data.get('pipeline_path', []))
+
+
+if msgspec is not None:
+    # serialize_bytes 的固定结构：按位置构造，由 msgspec 以 C 代码编码为 JSON 对象
+    _TankOut = msgspec.defstruct('TankOut', [(name, Any) for name in _TANK_FIELDS + ('occupied_until', 'cleaning_required')])
+    _PipelineOut = msgspec.defstruct('PipelineOut', [(name, Any) for name in _PIPELINE_FIELDS + ('occupancy_schedule', 'current_oil')])
+    _BranchOut = msgspec.defstruct('BranchOut', [(name, Any) for name in _BRANCH_FIELDS])
+    _MSGSPEC_ENCODER = msgspec.json.Encoder(enc_hook=_json_default)
+
+
+def _intern_id(value):
+    """驻留字符串类型的资源ID，使ID比较和字典查找走对象同一性的快速路径；其他类型的ID原样返回"""
+    if type(value) is str:
+        return sys.intern(value)
+    return value
+
+
+def _interned_copy(obj, id_fields):
+    """深拷贝业务对象，并驻留其ID字段"""
+    obj = deepcopy(obj)
+    for name in id_fields:
+        setattr(obj, name, _intern_id(getattr(obj, name)))
+    return obj
+
+
+class TankArrays:
+    """
+    油罐评分字段的列式存储（每个字段一个数组，行号与 ids 对应）
+    供调度器对全部候选油罐做向量化筛选和评分
+    """
+    
+    # 随油罐状态变化的列，派生状态时需要各自复制
+    _COLUMNS = ('inventory', 'safe_capacity', 'current_level', 'safe_level', 'min_safe_level',
+                'reserved', 'oil_code', 'status_ok', 'numeric_ok', 'type_mask')
+    
+    # 数值列及其对应的油罐字段；字段为 None（数据库中为 NULL）时该行记为 NaN
+    _NUMERIC_FIELDS = (('inventory', 'inventory'), ('safe_capacity', 'safe_tank_capacity'),
+                       ('current_level', 'current_level'), ('safe_level', 'safe_tank_level'),
+                       ('min_safe_level', 'min_safe_level'), ('reserved', 'reserved_volume'))
+    
+    def __init__(self, tanks: Mapping[str, Tank]):
+        self.ids = list(tanks)
+        self.index = {tid: row for row, tid in enumerate(self.ids)}
+        n = len(self.ids)
+        self.inventory = np.zeros(n)
+        self.safe_capacity = np.zeros(n)
+        self.current_level = np.zeros(n)
+        self.safe_level = np.zeros(n)
+        self.min_safe_level = np.zeros(n)
+        self.reserved = np.zeros(n)
+        self.oil_code = np.zeros(n, dtype=np.int64)
+        self.status_ok = np.zeros(n, dtype=bool)
+        self.numeric_ok = np.zeros(n, dtype=bool)  # 数值字段均不为 None
+        self.type_mask = np.zeros(n, dtype=np.int64)
+        for row, tank in enumerate(tanks.values()):
+            self._load_row(row, tank)
+        
+        # 按站点、按类型分组的行号
+        rows_by_site: Dict[str, List[int]] = {}
+        for row, tank in enumerate(tanks.values()):
+            rows_by_site.setdefault(tank.site_id, []).append(row)
+        self.rows_by_site = {site_id: np.array(rows, dtype=np.intp) for site_id, rows in rows_by_site.items()}
+        self.source_rows = np.flatnonzero(self.type_mask & TANK_SOURCE)
+        self._eligible_cache: Dict[tuple, np.ndarray] = {}  # (角色, 站点ID, 油品编码) -> 满足静态条件的行号，油品或状态变化时清空
+    
+    def _eligible_rows(self, rows: np.ndarray, target_oil: int) -> np.ndarray:
+        """在 rows 中筛选状态可用、数值字段齐全，且油品相同或为空罐的行"""
+        tank_oil = self.oil_code[rows]
+        ok = self.status_ok[rows] & self.numeric_ok[rows]
+        return rows[ok & ((tank_oil == target_oil) | (tank_oil == NO_OIL))]
+    
+    def oil_rows(self, target_oil: int) -> np.ndarray:
+        """油品为 target_oil 或为空罐、且数值字段齐全的行号（不论状态和类型，按油品缓存）"""
+        key = ("OIL", None, target_oil)
+        rows = self._eligible_cache.get(key)
+        if rows is None:
+            tank_oil = self.oil_code
+            oil_ok = (tank_oil == target_oil) | (tank_oil == NO_OIL)
+            rows = self._eligible_cache[key] = np.flatnonzero(oil_ok & self.numeric_ok)
+        return rows
+    
+    def eligible_source_rows(self, target_oil: int) -> np.ndarray:
+        """可作为 target_oil 源油罐的行号（只含状态、油品等静态条件，按油品缓存）"""
+        key = ("SOURCE", None, target_oil)
+        rows = self._eligible_cache.get(key)
+        if rows is None:
+            rows = self._eligible_cache[key] = self._eligible_rows(self.source_rows, target_oil)
+        return rows
+    
+    def eligible_target_rows(self, site_id: str, target_oil: int) -> Optional[np.ndarray]:
+        """站点内可接收 target_oil 的油罐行号（按站点和油品缓存），站点不存在时返回 None"""
+        key = ("TARGET", site_id, target_oil)
+        rows = self._eligible_cache.get(key)
+        if rows is None:
+            site_rows = self.rows_by_site.get(site_id)
+            if site_rows is None:
+                return None
+            rows = self._eligible_cache[key] = self._eligible_rows(site_rows, target_oil)
+        return rows
+    
+    def _load_row(self, row: int, tank: Tank):
+        """从油罐对象读取一行"""
+        numeric_ok = True
+        for column, field_name in self._NUMERIC_FIELDS:
+            value = getattr(tank, field_name)
+            if value is None:
+                value = np.nan
+                numeric_ok = False
+            getattr(self, column)[row] = value
+        self.numeric_ok[row] = numeric_ok
+        self.oil_code[row] = oil_code(tank.oil_type)
+        self.status_ok[row] = tank.status == "AVAILABLE"
+        self.type_mask[row] = tank.type_mask
+    
+    def copy(self) -> 'TankArrays':
+        """复制列数据；ids、行号索引和分组只读，与原对象共享"""
+        new = object.__new__(TankArrays)
+        new.__dict__.update(self.__dict__)
+        for name in self._COLUMNS:
+            setattr(new, name, getattr(self, name).copy())
+        new._eligible_cache = dict(self._eligible_cache)
+        return new
+    
+    def refresh(self, tanks: Mapping[str, Tank], tank_ids: Iterable[str]):
+        """油罐对象被修改后，重新读取对应的行"""
+        # 候选行只取决于状态、油品和数值字段是否齐全，仅在它们变化时才作废缓存（调度中通常只有库存变化）
+        stale = False
+        for tank_id in tank_ids:
+            row = self.index.get(tank_id)
+            if row is not None:
+                old = (self.oil_code[row], self.status_ok[row], self.numeric_ok[row])
+                self._load_row(row, tanks[tank_id])
+                stale = stale or (self.oil_code[row], self.status_ok[row], self.numeric_ok[row]) != old
+        if stale:
+            self._eligible_cache.clear()
+
 
 class State:
     """基础状态类 - 只包含基础资源信息和状态指标"""
     
+    __slots__ = (
+        # 资源
+        'tanks', 'pipelines', 'branches', 'topology_version', '_owned_tank_ids', '_owned_pipe_ids',
+        '_pipes_with_avail',
+        # 分支邻接索引
+        '_branch_tuples', 'branches_from_tank', 'branches_from_site_to_pipe', 'branches_from_pipe_to_site',
+        'branches_from_site_to_tank', 'branches_tank_to_tank',
+        # 油罐列式数据
+        '_tank_arrays', '_tank_arrays_owned',
+        # 全局指标、利用率与约束
+        'oil_switch_count', 'high_priority_satisfied', 'total_dispatch_orders', 'total_volume_dispatched',
+        'current_time', 'tank_utilization', 'pipeline_utilization', 'constraints'
+    )
+    
+    # 默认约束模板，只读；每个状态持有自己的浅拷贝
+    _DEFAULT_CONSTRAINTS = MappingProxyType({
+        'min_safe_level': 0.0,  # 最小安全液位
+        'max_cleaning_time': 2,  # 最大清洗时间(小时)
+        'max_transport_rate': 100.0  # 最大输送速率
+    })
+    
     def __init__(self, 
                  tanks: List[Tank], 
                  pipelines: List[Pipeline], 
@@ -18,10 +287,22 @@ class State:
             pipelines: 管道列表
             branches: 分支列表
         """
-        # 将列表转换为字典以便快速查找
-        self.tanks = {tank.tank_id: deepcopy(tank) for tank in tanks}
-        self.pipelines = {pipe.pipe_id: deepcopy(pipe) for pipe in pipelines}
-        self.branches = {branch.branch_id: deepcopy(branch) for branch in branches} if branches else {}
+        # 将列表转换为字典以便快速查找（字符串ID统一驻留）
+        tanks = [_interned_copy(tank, ('tank_id', 'site_id')) for tank in tanks]
+        pipelines = [_interned_copy(pipe, ('pipe_id',)) for pipe in pipelines]
+        branches = [_interned_copy(branch, ('branch_id', 'from_id', 'to_id')) for branch in branches or ()]
+        self.tanks: MutableMapping[str, Tank] = {tank.tank_id: tank for tank in tanks}
+        self.pipelines: MutableMapping[str, Pipeline] = {pipe.pipe_id: pipe for pipe in pipelines}
+        # 本状态独占（可原地修改）的油罐/管道ID；与其他状态共享的对象需先经 own_tank/own_pipeline 复制
+        self._owned_tank_ids = set(self.tanks)
+        self._owned_pipe_ids = set(self.pipelines)
+        # 实现了 is_available_at_time 的管道ID（管道类型在调度中不变，构造时判断一次）
+        self._pipes_with_avail = tuple(pid for pid, p in self.pipelines.items() if hasattr(p, 'is_available_at_time'))
+        self.branches = {branch.branch_id: branch for branch in branches}
+        self._build_branch_indices()
+        
+        self._tank_arrays: Optional[TankArrays] = None  # 油罐列式数据，首次使用时构建
+        self._tank_arrays_owned = True  # 列式数据未与其他状态共享，可原地刷新
         
         # 全局状态指标
         self.oil_switch_count = 0  # 油品切换总次数（优化目标）
@@ -30,16 +311,154 @@ class State:
         self.total_volume_dispatched = 0.0  # 总输送量
         self.current_time = datetime.now()  # 当前时间
         
-        # 资源利用率统计
-        self.tank_utilization = {}  # 油罐利用率
-        self.pipeline_utilization = {}  # 管线利用率
+        # 资源利用率统计（派生状态按引用共享，修改前需先替换为本状态自己的字典）
+        self.tank_utilization: Dict[str, float] = {}  # 油罐利用率
+        self.pipeline_utilization: Dict[str, float] = {}  # 管线利用率
         
         # 约束和限制
-        self.constraints = {
-            'min_safe_level': 0.0,  # 最小安全液位
-            'max_cleaning_time': 2,  # 最大清洗时间(小时)
-            'max_transport_rate': 100.0  # 最大输送速率
-        }
+        self.constraints = dict(State._DEFAULT_CONSTRAINTS)
+    
+    def _build_branch_indices(self):
+        """
+        按分支两端的资源类型（油罐/站点/管道）建立邻接索引，供路径搜索直接查找
+        
+        - branches_from_tank: (tank_id, site_id) -> 油罐到站点的分支
+        - branches_from_site_to_pipe: site_id -> 站点到管道的分支
+        - branches_from_pipe_to_site: (pipe_id, site_id) -> 管道到站点的分支
+        - branches_from_site_to_tank: (site_id, tank_id) -> 站点到油罐的分支
+        - branches_tank_to_tank: (from_tank_id, to_tank_id) -> 油罐间直连分支
+        
+        索引中的分支均以 (from_id, to_id, branch_id) 元组表示
+        
+        每次重建索引都分配新的 topology_version，调度器按它区分不同拓扑的路径缓存；
+        派生状态共享索引，也沿用同一个版本号
+        """
+        self.topology_version = next(_TOPOLOGY_VERSIONS)
+        self._branch_tuples = [(b.from_id, b.to_id, b.branch_id) for b in self.branches.values()]
+        site_ids = {tank.site_id for tank in self.tanks.values()}
+        self.branches_from_tank = {}
+        self.branches_from_site_to_pipe = {}
+        self.branches_from_pipe_to_site = {}
+        self.branches_from_site_to_tank = {}
+        self.branches_tank_to_tank = {}
+        
+        for branch in self._branch_tuples:
+            from_id, to_id, _ = branch
+            if from_id in self.tanks and to_id in site_ids:
+                self.branches_from_tank.setdefault((from_id, to_id), []).append(branch)
+            if from_id in site_ids and to_id in self.pipelines:
+                self.branches_from_site_to_pipe.setdefault(from_id, []).append(branch)
+            if from_id in self.pipelines and to_id in site_ids:
+                self.branches_from_pipe_to_site.setdefault((from_id, to_id), []).append(branch)
+            if from_id in site_ids and to_id in self.tanks:
+                self.branches_from_site_to_tank.setdefault((from_id, to_id), []).append(branch)
+            if from_id in self.tanks and to_id in self.tanks:
+                self.branches_tank_to_tank.setdefault((from_id, to_id), []).append(branch)
+    
+    def tank_arrays(self) -> TankArrays:
+        """获取油罐列式数据（惰性构建）"""
+        arrays = self._tank_arrays
+        if arrays is None:
+            arrays = self._tank_arrays = TankArrays(self.tanks)
+            self._tank_arrays_owned = True
+        return arrays
+    
+    def _own_tank_arrays(self):
+        """列式数据与其他状态共享时先复制一份，之后可原地刷新"""
+        if not self._tank_arrays_owned:
+            if self._tank_arrays is not None:
+                self._tank_arrays = self._tank_arrays.copy()
+            self._tank_arrays_owned = True
+    
+    def refresh_tank_arrays(self, tank_ids: Optional[Iterable[str]] = None):
+        """
+        直接修改油罐对象后同步列式数据
+        
+        Args:
+            tank_ids: 被修改的油罐ID，为 None 时整体重建
+        """
+        if self._tank_arrays is None:
+            return
+        if tank_ids is None:
+            self._tank_arrays = None
+        else:
+            self._own_tank_arrays()
+            self._tank_arrays.refresh(self.tanks, tank_ids)
+    
+    def fork(self) -> 'State':
+        """
+        写时复制地派生一个新状态：资源对象与当前状态共享，索引与拓扑直接引用
+        
+        tanks/pipelines 以 ChainMap 增量层表示：现有各层冻结共享，双方各自获得一个空的顶层，
+        派生代价与资源数量无关；油罐列式数据和利用率字典同样按引用共享，列式数据在首次 own_tank 时才复制；
+        约束字典很小，浅拷贝一份，双方可各自修改
+        
+        注意 fork 也会改动当前状态：tanks/pipelines 换成新的 ChainMap，并放弃对油罐、管道和列式数据的独占，
+        之后当前状态修改资源同样须先调用 own_tank/own_pipeline，以免改到派生状态看到的对象
+        """
+        new_state = object.__new__(State)
+        for name in State.__slots__:
+            setattr(new_state, name, getattr(self, name))
+        tank_layers = _shared_layers(self.tanks)
+        pipe_layers = _shared_layers(self.pipelines)
+        self.tanks = ChainMap({}, *tank_layers)
+        self.pipelines = ChainMap({}, *pipe_layers)
+        new_state.tanks = ChainMap({}, *tank_layers)
+        new_state.pipelines = ChainMap({}, *pipe_layers)
+        new_state.constraints = self.constraints.copy()
+        self._tank_arrays_owned = False
+        new_state._tank_arrays_owned = False
+        self._owned_tank_ids = set()
+        self._owned_pipe_ids = set()
+        new_state._owned_tank_ids = set()
+        new_state._owned_pipe_ids = set()
+        return new_state
+    
+    def clone(self) -> 'State':
+        """完整、独立的状态快照（经 pickle 协议 5 往返，比 deepcopy 快）"""
+        snapshot = pickle.loads(pickle.dumps(self, protocol=5))
+        snapshot._tank_arrays_owned = True  # 快照中的列式数据是独立副本
+        return snapshot
+    
+    def materialize(self):
+        """
+        把增量层压平为普通字典，之后的查找不再逐层遍历
+        
+        调度器在每个订单调度完成后对最新状态调用；压平只影响本状态，与其他状态共享的层保持不变
+        """
+        self.tanks = dict(self.tanks)
+        self.pipelines = dict(self.pipelines)
+    
+    def own_tank(self, tank_id: str) -> Tank:
+        """返回可原地修改的油罐对象，与其他状态共享时先复制一份"""
+        tank = self.tanks[tank_id]
+        if tank_id not in self._owned_tank_ids:
+            tank = self.tanks[tank_id] = tank.copy()
+            self._owned_tank_ids.add(tank_id)
+            self._own_tank_arrays()
+        return tank
+    
+    def own_pipeline(self, pipe_id: str) -> Pipeline:
+        """返回可原地修改的管道对象，与其他状态共享时先复制一份"""
+        pipeline = self.pipelines[pipe_id]
+        if pipe_id not in self._owned_pipe_ids:
+            pipeline = self.pipelines[pipe_id] = pipeline.copy()
+            self._owned_pipe_ids.add(pipe_id)
+        return pipeline
+    
+    def reserve_tank(self, tank_id: str, volume: float):
+        """
+        预留油罐中指定体积的油（见 Tank.reserve），并同步列式数据
+        
+        直接调用 Tank.reserve 不会通知持有该油罐的状态，油罐查找会读到修改前的数据
+        """
+        self.own_tank(tank_id).reserve(volume)
+        self.refresh_tank_arrays([tank_id])
+    
+    def release_tank(self, tank_id: str):
+        """释放油罐的预留状态（见 Tank.release），并同步列式数据"""
+        self.own_tank(tank_id).release()
+        self.refresh_tank_arrays([tank_id])
     
     def apply_dispatch_order(self, order_data: Dict[str, Any]) -> 'State':
         """
@@ -51,29 +470,18 @@ class State:
         Returns:
             应用工单后的新状态
         """
-        # 创建新状态的副本
-        new_state = State(
-            tanks=list(self.tanks.values()),
-            pipelines=list(self.pipelines.values()),
-            branches=list(self.branches.values()) if self.branches else []
-        )
-        
-        # 复制当前状态的指标
-        new_state.oil_switch_count = self.oil_switch_count
-        new_state.high_priority_satisfied = self.high_priority_satisfied
-        new_state.total_dispatch_orders = self.total_dispatch_orders
-        new_state.total_volume_dispatched = self.total_volume_dispatched
-        new_state.current_time = self.current_time
-        new_state.tank_utilization = self.tank_utilization.copy()
-        new_state.pipeline_utilization = self.pipeline_utilization.copy()
-        new_state.constraints = self.constraints.copy()
+        # 写时复制派生新状态（指标随之复制），只复制被修改的油罐
+        new_state = self.fork()
+        
+        # 工单字段一次读出
+        source_tank_id, target_tank_id, required_volume, oil_type, pipeline_path = _read_order_data(order_data)
+        source_tank_id = str(source_tank_id)
+        target_tank_id = str(target_tank_id)
         
         # 更新源油罐状态
-        source_tank_id = str(order_data.get('source_tank_id', ''))
+        oil_switched = False
         if source_tank_id in new_state.tanks:
-            source_tank = new_state.tanks[source_tank_id]
-            required_volume = order_data.get('required_volume', 0.0)
-            oil_type = order_data.get('oil_type', '')
+            source_tank = new_state.own_tank(source_tank_id)
             
             # 减少库存（确保不低于安全液位）
             new_inventory = source_tank.inventory - required_volume
@@ -84,21 +492,17 @@ class State:
                 source_tank.current_level = source_tank.inventory / source_tank.safe_tank_capacity
             
             # 更新占用时间
-            end_time = self._parse_datetime(order_data.get('end_time'))
-            branch_end_time = self._parse_datetime(order_data.get('branch_end_time', end_time))
             # source_tank.occupied_until = max(source_tank.occupied_until, branch_end_time)
             
-            # 检查是否需要清洗（油品切换）
-            if source_tank.oil_type and source_tank.oil_type != oil_type:
+            # 检查是否需要清洗（油品切换），须在改写油品之前判断
+            oil_switched = bool(source_tank.oil_type and source_tank.oil_type != oil_type)
+            if oil_switched:
                 source_tank.oil_type = oil_type
                 # source_tank.cleaning_required = True
         
         # 更新目标油罐状态
-        target_tank_id = str(order_data.get('target_tank_id', ''))
         if target_tank_id in new_state.tanks:
-            target_tank = new_state.tanks[target_tank_id]
-            required_volume = order_data.get('required_volume', 0.0)
-            oil_type = order_data.get('oil_type', '')
+            target_tank = new_state.own_tank(target_tank_id)
             
             # 增加库存
             target_tank.inventory += required_volume
@@ -111,24 +515,14 @@ class State:
                 )
             
             # 更新占用时间
-            end_time = self._parse_datetime(order_data.get('end_time'))
-            branch_end_time = self._parse_datetime(order_data.get('branch_end_time', end_time))
             # target_tank.occupied_until = max(target_tank.occupied_until, branch_end_time)
             target_tank.oil_type = oil_type
         
         # 更新管道状态
-        pipeline_path = order_data.get('pipeline_path', [])
         for pipe_id in pipeline_path:
             str_pipe_id = str(pipe_id)
             if str_pipe_id in new_state.pipelines:
                 pipeline = new_state.pipelines[str_pipe_id]
-                start_time = self._parse_datetime(order_data.get('start_time'))
-                end_time = self._parse_datetime(order_data.get('end_time'))
-                oil_type = order_data.get('oil_type', '')
-                required_volume = order_data.get('required_volume', 0.0)
-                source_tank_id = str(order_data.get('source_tank_id', ''))
-                target_tank_id = str(order_data.get('target_tank_id', ''))
-                dispatch_order_id = order_data.get('dispatch_order_id', '')
                 
                 # # 添加占用计划
                 # pipeline.occupancy_schedule.append((
@@ -139,56 +533,18 @@ class State:
                 # # 更新当前油品
                 # pipeline.current_oil = oil_type
         
+        new_state.refresh_tank_arrays([source_tank_id, target_tank_id])
+        
         # 更新全局指标
         new_state.total_dispatch_orders += 1
         # new_state.total_volume_dispatched += required_volume
         
         # 检查油品切换
-        if self._is_oil_switch_needed_in_state(new_state, order_data):
+        if oil_switched:
             new_state.oil_switch_count += 1
         
         return new_state
     
-    def _is_oil_switch_needed_in_state(self, state: 'State', order_data: Dict[str, Any]) -> bool:
-        """
-        检查在给定状态下是否需要油品切换
-        
-        Args:
-            state: 当前状态
-            order_data: 调度工单数据
-            
-        Returns:
-            是否需要油品切换
-        """
-        source_tank_id = str(order_data.get('source_tank_id', ''))
-        oil_type = order_data.get('oil_type', '')
-        
-        if source_tank_id in state.tanks:
-            source_tank = state.tanks[source_tank_id]
-            if source_tank.oil_type and source_tank.oil_type != oil_type:
-                return True
-        
-        return False
-    
-    def _parse_datetime(self, dt_value) -> datetime:
-        """
-        解析时间值
-        
-        Args:
-            dt_value: 时间值，支持多种格式
-            
-        Returns:
-            datetime对象
-        """
-        if isinstance(dt_value, datetime):
-            return dt_value
-        elif isinstance(dt_value, str):
-            return datetime.fromisoformat(dt_value.replace('Z', '+00:00'))
-        elif isinstance(dt_value, (int, float)):  # 假设是时间戳
-            return datetime.fromtimestamp(dt_value)
-        else:  # 默认返回当前时间
-            return datetime.now()
-    
     def get_available_tanks_for_oil_type(self, oil_type: str, min_volume: float = 0, 
                                          check_time: Optional[datetime] = None) -> List[str]:
         """
@@ -202,21 +558,14 @@ class State:
         Returns:
             可用油罐ID列表
         """
-        available_tanks = []
         check_time = check_time or self.current_time
+        arrays = self.tank_arrays()
         
-        for tank_id, tank in self.tanks.items():
-            # 检查油品类型匹配
-            if tank.oil_type != oil_type and tank.oil_type is not None:
-                continue
-            
-            # 检查容量
-            reserved_volume = getattr(tank, 'reserved_volume', 0, 0)
-            available_capacity = tank.inventory - reserved_volume
-            if available_capacity >= min_volume + tank.min_safe_level:
-                available_tanks.append(tank_id)
-        
-        return available_tanks
+        # 先按油品取候选行（油品相同或为空罐），再筛选扣除预留量后的可用库存
+        rows = arrays.oil_rows(oil_code(oil_type))
+        volume_ok = arrays.inventory[rows] - arrays.reserved[rows] >= min_volume + arrays.min_safe_level[rows]
+        ids = arrays.ids
+        return [ids[row] for row in rows[volume_ok]]
     
     def get_available_pipelines(self, start_time: datetime, end_time: datetime) -> List[str]:
         """
@@ -229,13 +578,10 @@ class State:
         Returns:
             可用管道ID列表
         """
-        available_pipelines = []
-        
-        for pipe_id, pipeline in self.pipelines.items():
-            if hasattr(pipeline, 'is_available_at_time') and pipeline.is_available_at_time(start_time, end_time):
-                available_pipelines.append(pipe_id)
-        
-        return available_pipelines
+        # 管道对象可能被写时复制替换，按ID取当前对象，不缓存绑定方法
+        pipelines = self.pipelines
+        return [pipe_id for pipe_id in self._pipes_with_avail
+                if pipelines[pipe_id].is_available_at_time(start_time, end_time)]  # type: ignore[attr-defined]
     
     def calculate_resource_utilization(self) -> float:
         """
@@ -247,15 +593,12 @@ class State:
         if not self.tanks:
             return 0.0
         
-        total_utilization = 0.0
-        count = 0
-        
-        for tank in self.tanks.values():
-            utilization = (tank.inventory / tank.safe_tank_capacity) if tank.safe_tank_capacity > 0 else 0
-            total_utilization += utilization
-            count += 1
-        
-        return total_utilization / count if count > 0 else 0.0
+        arrays = self.tank_arrays()
+        capacity = arrays.safe_capacity
+        # 数值字段缺失的油罐按 0 计
+        utilization = np.divide(arrays.inventory, capacity, out=np.zeros_like(capacity),
+                                where=(capacity > 0) & arrays.numeric_ok)
+        return float(utilization.mean())
     
     def get_conflicts(self) -> List[Dict]:
         """
@@ -278,20 +621,28 @@ class State:
         
         # 检查管道时间冲突
         for pipe_id, pipeline in self.pipelines.items():
-            if hasattr(pipeline, 'occupancy_schedule'):
-                schedule = pipeline.occupancy_schedule
-                # 检查时间重叠
-                for i in range(len(schedule)):
-                    for j in range(i + 1, len(schedule)):
-                        start1, end1, _, _, _, _, _ = schedule[i]
-                        start2, end2, _, _, _, _, _ = schedule[j]
-                        if not (end1 <= start2 or start1 >= end2):
-                            conflicts.append({
-                                'type': 'pipeline_time_conflict',
-                                'resource_id': pipe_id,
-                                'schedule1': schedule[i],
-                                'schedule2': schedule[j]
-                            })
+            schedule = getattr(pipeline, 'occupancy_schedule', None)
+            if not schedule:
+                continue
+            # 按开始时间扫描，堆中保存尚未结束的占用 (结束时间, 序号)，只与仍活跃的占用比较
+            overlapping = []
+            active: List[tuple] = []
+            for j in sorted(range(len(schedule)), key=lambda k: schedule[k][0]):
+                start2, end2 = schedule[j][0], schedule[j][1]
+                while active and active[0][0] <= start2:
+                    heapq.heappop(active)
+                for _, i in active:
+                    if schedule[i][0] < end2:
+                        overlapping.append((i, j) if i < j else (j, i))
+                heapq.heappush(active, (end2, j))
+            # 按原有的 (i, j) 顺序输出
+            for i, j in sorted(overlapping):
+                conflicts.append({
+                    'type': 'pipeline_time_conflict',
+                    'resource_id': pipe_id,
+                    'schedule1': schedule[i],
+                    'schedule2': schedule[j]
+                })
         
         return conflicts
     
@@ -338,17 +689,17 @@ class State:
                 'min_safe_level': t.min_safe_level,
                 'tank_type': t.tank_type,
                 'status': t.status,
-                'occupied_until': t.occupied_until.isoformat() if hasattr(t, 'occupied_until') and t.occupied_until != datetime.min else None,
+                'occupied_until': _iso(t.occupied_until) if hasattr(t, 'occupied_until') and t.occupied_until != datetime.min else None,
                 'cleaning_required': getattr(t, 'cleaning_required', False)
             } for tid, t in self.tanks.items()},
             'pipelines': {pid: {
                 'pipe_id': p.pipe_id,
                 'pipe_name': p.pipe_name,
                 'pipe_capacity_per_meter': p.pipe_capacity_per_meter,
-                'pipe_shutdown_start_time': p.pipe_shutdown_start_time.isoformat() if p.pipe_shutdown_start_time else None,
-                'pipe_shutdown_end_time': p.pipe_shutdown_end_time.isoformat() if p.pipe_shutdown_end_time else None,
+                'pipe_shutdown_start_time': _iso(p.pipe_shutdown_start_time) if p.pipe_shutdown_start_time else None,
+                'pipe_shutdown_end_time': _iso(p.pipe_shutdown_end_time) if p.pipe_shutdown_end_time else None,
                 'pipe_shutdown_reason': p.pipe_shutdown_reason,
-                'occupancy_schedule': [(s[0].isoformat(), s[1].isoformat(), s[2], s[3], s[4], s[5], s[6]) for s in getattr(p, 'occupancy_schedule', [])],
+                'occupancy_schedule': [_serialize_occupancy(s) for s in getattr(p, 'occupancy_schedule', [])],
                 'current_oil': getattr(p, 'current_oil', None)
             } for pid, p in self.pipelines.items()},
             'branches': {bid: {
@@ -369,11 +720,60 @@ class State:
                 'high_priority_satisfied': self.high_priority_satisfied,
                 'total_dispatch_orders': self.total_dispatch_orders,
                 'total_volume_dispatched': self.total_volume_dispatched,
-                'current_time': self.current_time.isoformat()
+                'current_time': _iso(self.current_time)
             },
             'constraints': self.constraints
         }
     
+    def serialize_bytes(self) -> bytes:
+        """
+        序列化当前状态为 JSON 字节串，结构与 serialize_state 相同
+        
+        datetime 保持原值交给编码器处理，不逐个调用 isoformat；编码器依次优先 msgspec、orjson、标准库 json
+        
+        Returns:
+            UTF-8 编码的 JSON
+        """
+        global_metrics = {
+            'oil_switch_count': self.oil_switch_count,
+            'high_priority_satisfied': self.high_priority_satisfied,
+            'total_dispatch_orders': self.total_dispatch_orders,
+            'total_volume_dispatched': self.total_volume_dispatched,
+            'current_time': self.current_time
+        }
+        constraints = self.constraints
+        if msgspec is not None:
+            return _MSGSPEC_ENCODER.encode({
+                'tanks': {tid: _TankOut(*_get_tank_fields(t),
+                                        t.occupied_until if t.occupied_until != datetime.min else None,
+                                        t.cleaning_required)
+                          for tid, t in self.tanks.items()},
+                'pipelines': {pid: _PipelineOut(*_get_pipeline_fields(p), p.occupancy_schedule, p.current_oil)
+                              for pid, p in self.pipelines.items()},
+                'branches': {bid: _BranchOut(*_get_branch_fields(b)) for bid, b in self.branches.items()},
+                'global_metrics': global_metrics,
+                'constraints': constraints
+            })
+        payload = {
+            'tanks': {tid: {
+                **dict(zip(_TANK_FIELDS, _get_tank_fields(t))),
+                'occupied_until': t.occupied_until if t.occupied_until != datetime.min else None,
+                'cleaning_required': t.cleaning_required
+            } for tid, t in self.tanks.items()},
+            'pipelines': {pid: {
+                **dict(zip(_PIPELINE_FIELDS, _get_pipeline_fields(p))),
+                'occupancy_schedule': p.occupancy_schedule,
+                'current_oil': p.current_oil
+            } for pid, p in self.pipelines.items()},
+            'branches': {bid: dict(zip(_BRANCH_FIELDS, _get_branch_fields(b)))
+                         for bid, b in self.branches.items()},
+            'global_metrics': global_metrics,
+            'constraints': constraints
+        }
+        if orjson is not None:
+            return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY, default=_json_default)
+        return json.dumps(payload, ensure_ascii=False, default=_json_default).encode('utf-8')
+    
     def deserialize_state(self, state_dict: Dict[str, Any]) -> 'State':
         """
         从字典反序列化状态
@@ -387,25 +787,26 @@ class State:
         # 恢复油罐状态
         for tank_id, tank_data in state_dict['tanks'].items():
             if tank_id in self.tanks:
-                tank = self.tanks[tank_id]
+                tank = self.own_tank(tank_id)
                 tank.oil_type = tank_data['oil_type']
                 tank.inventory = tank_data['inventory']
                 tank.current_level = tank_data['current_level']
                 tank.status = tank_data['status']
                 tank.cleaning_required = tank_data.get('cleaning_required', False)
                 if tank_data.get('occupied_until'):
-                    tank.occupied_until = datetime.fromisoformat(tank_data['occupied_until'])
+                    tank.occupied_until = _parse_iso(tank_data['occupied_until'])
+        self.refresh_tank_arrays()
         
         # 恢复管道状态
         for pipe_id, pipe_data in state_dict['pipelines'].items():
             if pipe_id in self.pipelines:
-                pipeline = self.pipelines[pipe_id]
+                pipeline = self.own_pipeline(pipe_id)
                 pipeline.current_oil = pipe_data.get('current_oil')
                 if 'occupancy_schedule' in pipe_data:
-                    pipeline.occupancy_schedule = [
-                        (datetime.fromisoformat(s[0]), datetime.fromisoformat(s[1]), s[2], s[3], s[4], s[5], s[6])
+                    pipeline.set_occupancy_schedule([
+                        (_parse_iso(s[0]), _parse_iso(s[1]), s[2], s[3], s[4], s[5], s[6])
                         for s in pipe_data['occupancy_schedule']
-                    ]
+                    ])
         
         # 恢复全局指标
         metrics = state_dict['global_metrics']
@@ -413,7 +814,7 @@ class State:
         self.high_priority_satisfied = metrics['high_priority_satisfied']
         self.total_dispatch_orders = metrics['total_dispatch_orders']
         self.total_volume_dispatched = metrics['total_volume_dispatched']
-        self.current_time = datetime.fromisoformat(metrics['current_time'])
+        self.current_time = _parse_iso(metrics['current_time'])
         
         # 恢复约束
         self.constraints = state_dict.get('constraints', self.constraints)
@@ -7,6 +7,9 @@
 echo -n "Running tests...."
 echo  -e "\n Testing DataBase"
 python3 test_db_connection.py
+echo  -e "\n Testing Scheduler and State"
+python3 -m pytest -q test_scheduler_paths.py test_pipeline_occupancy.py test_tank_selection.py \
+    test_state_fork.py test_state_conflicts.py test_state_serialization.py test_framework_paths.py
 #echo -e "\nTesting xyz......" For future reference
 #python3 test_xyz.py
 echo "All tests done!"
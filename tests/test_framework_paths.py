@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+PipelineScheduler.find_feasible_path 的测试
+全量评分策略取最高分路径，按偏好选路的策略取第一条可行路径
+"""
+from framework import Tank, Pipeline, SchedulingState, PipelineScheduler, RuleBasedScoring, PreferenceOrderScoring
+
+
+def _build_state():
+    tanks = {tid: Tank(tid, 1000, 500, ["oilA"], (0, 1000)) for tid in ("tank1", "tank2")}
+    pipelines = {pid: Pipeline(pid, "n1", "n2", 200, 1.0) for pid in ("pipe1", "pipe2", "pipe3")}
+    state = SchedulingState(tanks, pipelines)
+    # 两段路径上的管线都已在输送 oilA，逐段累加后得分高于单段路径
+    state.pipelines["pipe2"].current_oil = "oilA"
+    state.pipelines["pipe3"].current_oil = "oilA"
+    return state
+
+
+def test_full_scan_strategy_picks_highest_score():
+    scheduler = PipelineScheduler(path_scoring_strategy=RuleBasedScoring())
+    path, score = scheduler.find_feasible_path("tank1", "tank2", "oilA", 100, 0, _build_state())
+
+    assert path == ["pipe2", "pipe3"]
+    assert score == 340
+
+
+def test_preference_order_strategy_returns_first_feasible_path():
+    scheduler = PipelineScheduler(path_scoring_strategy=PreferenceOrderScoring())
+    path, score = scheduler.find_feasible_path("tank1", "tank2", "oilA", 100, 0, _build_state())
+
+    assert path == ["pipe1"]
+    assert score == 20
+
+    # 首选路径能力不足时顺延到下一条
+    state = _build_state()
+    state.pipelines["pipe1"].capacity = 50
+    path, _ = scheduler.find_feasible_path("tank1", "tank2", "oilA", 100, 0, state)
+    assert path == ["pipe2", "pipe3"]
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Pipeline 占用计划与时间冲突检测的测试
+与逐条扫描占用记录的参考实现在随机占用计划上比较结果
+"""
+import random
+
+from data_class import Pipeline
+
+
+def _reference_conflict(schedule, start_time, end_time):
+    """参考实现：逐条检查 [start_time, end_time) 与占用记录是否重叠"""
+    return any(not (end_time <= occ[0] or start_time >= occ[1]) for occ in schedule)
+
+
+def _random_occupancy(rng):
+    start = rng.randint(0, 100)
+    return (start, start + rng.randint(-5, 30), "oilA", 1.0)
+
+
+def test_has_time_conflict_matches_linear_scan():
+    rng = random.Random(0)
+    for _ in range(500):
+        pipeline = Pipeline(pipe_id="P1")
+        for _ in range(rng.randint(0, 12)):
+            pipeline.add_occupancy(_random_occupancy(rng))
+        for _ in range(20):
+            start = rng.randint(-10, 140)
+            end = start + rng.randint(-5, 40)
+            expected = _reference_conflict(pipeline.occupancy_schedule, start, end)
+            assert pipeline.has_time_conflict(start, end) == expected
+
+
+def test_add_occupancy_matches_bulk_schedule():
+    rng = random.Random(1)
+    for _ in range(200):
+        schedule = [_random_occupancy(rng) for _ in range(rng.randint(0, 12))]
+        inserted = Pipeline(pipe_id="P1")
+        for occ in schedule:
+            inserted.add_occupancy(occ)
+        bulk = Pipeline(pipe_id="P1", occupancy_schedule=list(schedule))
+
+        assert [occ[0] for occ in inserted.occupancy_schedule] == sorted(occ[0] for occ in schedule)
+        assert sorted(inserted.occupancy_schedule) == sorted(bulk.occupancy_schedule)
+        for start in range(-5, 140, 7):
+            assert inserted.has_time_conflict(start, start + 10) == bulk.has_time_conflict(start, start + 10)
+
+
+def test_copy_has_independent_schedule():
+    pipeline = Pipeline(pipe_id="P1", occupancy_schedule=[(10, 20, "oilA", 1.0)])
+    copied = pipeline.copy()
+    copied.add_occupancy((30, 40, "oilA", 1.0))
+
+    assert len(pipeline.occupancy_schedule) == 1
+    assert not pipeline.has_time_conflict(30, 40)
+    assert copied.has_time_conflict(30, 40)
+
+
+def test_assigning_schedule_rebuilds_index():
+    pipeline = Pipeline(pipe_id="P1", occupancy_schedule=[(10, 20, "oilA", 1.0)])
+    pipeline.occupancy_schedule = [(50, 60, "oilA", 1.0), (30, 40, "oilA", 1.0)]
+
+    assert [occ[0] for occ in pipeline.occupancy_schedule] == [30, 50]
+    assert not pipeline.has_time_conflict(10, 20)
+    assert pipeline.has_time_conflict(35, 36)
+    assert pipeline.has_time_conflict(55, 56)
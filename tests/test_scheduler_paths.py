@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Scheduler 路径搜索与路径缓存的测试
+与逐个扫描分支的参考实现在随机管网上比较结果
+"""
+import random
+
+from data_class import Tank, Pipeline, Branch, DispatchOrder
+from scheduler import Scheduler
+from state import State
+
+
+def _reference_paths(source_tank_id, target_tank_id, state):
+    """参考实现：不使用邻接索引和缓存，逐个扫描全部分支"""
+    if source_tank_id not in state.tanks or target_tank_id not in state.tanks:
+        return []
+    source_tank = state.tanks[source_tank_id]
+    target_tank = state.tanks[target_tank_id]
+    if source_tank.site_id == target_tank.site_id:
+        return [[source_tank_id, "LOCAL", "LOCAL", "LOCAL", target_tank_id]]
+
+    branches = list(state.branches.values())
+    source_branches = [b for b in branches
+                       if b.from_id == source_tank_id and b.to_id == source_tank.site_id]
+    site_to_pipe = [b for b in branches
+                    if b.from_id == source_tank.site_id and b.to_id in state.pipelines]
+    pipe_to_site = [b for b in branches
+                    if b.to_id == target_tank.site_id and b.from_id in state.pipelines]
+    target_branches = [b for b in branches
+                       if b.from_id == target_tank.site_id and b.to_id == target_tank_id]
+
+    paths = []
+    for source_branch in source_branches:
+        for pipe_branch in site_to_pipe:
+            for site_branch in pipe_to_site:
+                if site_branch.from_id != pipe_branch.to_id:
+                    continue
+                for _ in target_branches:
+                    paths.append([source_tank_id, source_branch.branch_id, pipe_branch.to_id,
+                                  site_branch.branch_id, target_tank_id])
+    for b in branches:
+        if b.from_id == source_tank_id and b.to_id == target_tank_id:
+            paths.append([source_tank_id, b.branch_id, "DIRECT", b.branch_id, target_tank_id])
+    return paths
+
+
+def _random_state(rng, n_sites=3, n_tanks=6, n_pipes=2, n_branches=25):
+    """随机生成站点、油罐、管道及各类分支"""
+    sites = [f"S{i}" for i in range(n_sites)]
+    tanks = [Tank(tank_id=f"T{i}", site_id=rng.choice(sites)) for i in range(n_tanks)]
+    pipelines = [Pipeline(pipe_id=f"P{i}", pipe_capacity_per_meter=1.0) for i in range(n_pipes)]
+    tank_ids = [t.tank_id for t in tanks]
+    pipe_ids = [p.pipe_id for p in pipelines]
+    endpoints = [
+        (tank_ids, sites),  # 油罐 -> 站点
+        (sites, pipe_ids),  # 站点 -> 管道
+        (pipe_ids, sites),  # 管道 -> 站点
+        (sites, tank_ids),  # 站点 -> 油罐
+        (tank_ids, tank_ids),  # 油罐直连
+    ]
+    branches = []
+    for i in range(n_branches):
+        from_ids, to_ids = rng.choice(endpoints)
+        branches.append(Branch(branch_id=f"B{i}", from_id=rng.choice(from_ids), to_id=rng.choice(to_ids)))
+    return State(tanks, pipelines, branches)
+
+
+def test_cached_paths_match_reference():
+    rng = random.Random(0)
+    for _ in range(200):
+        state = _random_state(rng)
+        scheduler = Scheduler()
+        tank_ids = list(state.tanks)
+        for _ in range(10):
+            source, target = rng.choice(tank_ids), rng.choice(tank_ids)
+            expected = _reference_paths(source, target, state)
+            assert scheduler._get_all_paths(source, target, state) == expected
+            # 第二次走缓存
+            assert scheduler._get_all_paths(source, target, state) == expected
+            assert scheduler._get_first_path(source, target, state) == (expected[0] if expected else None)
+
+
+def test_first_path_lookup_without_full_search_matches_reference():
+    rng = random.Random(1)
+    for _ in range(200):
+        state = _random_state(rng)
+        scheduler = Scheduler()
+        tank_ids = list(state.tanks)
+        source, target = rng.choice(tank_ids), rng.choice(tank_ids)
+        expected = _reference_paths(source, target, state)
+        assert scheduler._get_first_path(source, target, state) == (expected[0] if expected else None)
+
+
+def test_returned_path_is_not_the_cached_list():
+    state = State(
+        [Tank(tank_id="T1", site_id="S1"), Tank(tank_id="T2", site_id="S2")],
+        [Pipeline(pipe_id="P1", pipe_capacity_per_meter=1.0)],
+        [Branch(branch_id="B1", from_id="T1", to_id="S1"),
+         Branch(branch_id="B2", from_id="S1", to_id="P1"),
+         Branch(branch_id="B3", from_id="P1", to_id="S2"),
+         Branch(branch_id="B4", from_id="S2", to_id="T2")]
+    )
+    scheduler = Scheduler()
+    order = DispatchOrder(dispatch_order_id="D1")
+
+    first = scheduler._find_feasible_path("T1", "T2", order, state)
+    assert first == ["T1", "B1", "P1", "B3", "T2"]
+    first.append("X")
+    second = scheduler._find_feasible_path("T1", "T2", order, state)
+    assert second == ["T1", "B1", "P1", "B3", "T2"]
+    assert second is not first
+
+
+def test_cache_is_not_shared_between_topologies():
+    tanks = [Tank(tank_id="T1", site_id="S1"), Tank(tank_id="T2", site_id="S2")]
+    direct = State(tanks, [], [Branch(branch_id="B1", from_id="T1", to_id="T2")])
+    unconnected = State(tanks, [], [])
+    scheduler = Scheduler()
+
+    assert scheduler._get_first_path("T1", "T2", direct) == ["T1", "B1", "DIRECT", "B1", "T2"]
+    assert scheduler._get_first_path("T1", "T2", unconnected) is None
+    assert scheduler._get_all_paths("T1", "T2", unconnected) == []
+
+    # 派生状态共享拓扑，沿用同一个版本号
+    assert direct.fork().topology_version == direct.topology_version
+    assert direct.topology_version != unconnected.topology_version
+
+
+def test_path_score_counts_only_pipelines_on_the_path():
+    state = State(
+        [Tank(tank_id="T1", site_id="S1"), Tank(tank_id="T2", site_id="S2"), Tank(tank_id="T3", site_id="S1")],
+        [Pipeline(pipe_id="P1", pipe_capacity_per_meter=1.0, current_oil="oilA"),
+         Pipeline(pipe_id="P2", pipe_capacity_per_meter=1.0, current_oil="oilB"),
+         Pipeline(pipe_id="P3", pipe_capacity_per_meter=1.0)],
+        []
+    )
+    scoring = Scheduler().path_scoring
+
+    # 同油品 +100，容量 100 t/h 满足 +20
+    assert scoring.calculate_score(["T1", "B1", "P1", "B2", "T2"], "oilA", 0, state, 50) == 120.0
+    # 需要清洗 -80，容量不足 -30
+    assert scoring.calculate_score(["T1", "B1", "P2", "B2", "T2"], "oilA", 0, state, 150) == -110.0
+    # 空管线不加减分
+    assert scoring.calculate_score(["T1", "B1", "P3", "B2", "T2"], "oilA", 0, state, 50) == 20.0
+    # 同站点路径不经过管线，不受容量限制
+    assert scoring.calculate_score(["T1", "LOCAL", "LOCAL", "LOCAL", "T3"], "oilA", 0, state, 500) == 20.0
+
+
+def test_capacity_check_reads_the_main_pipeline():
+    state = State(
+        [Tank(tank_id="T1", site_id="S1"), Tank(tank_id="T2", site_id="S2")],
+        [Pipeline(pipe_id="P1", pipe_capacity_per_meter=1.0)],
+        [Branch(branch_id="B1", from_id="T1", to_id="T2")]
+    )
+    scheduler = Scheduler()
+
+    assert scheduler._check_capacity(["T1", "B1", "P1", "B2", "T2"], 100, 0, state)
+    assert not scheduler._check_capacity(["T1", "B1", "P1", "B2", "T2"], 101, 0, state)
+    assert scheduler._check_capacity(["T1", "LOCAL", "LOCAL", "LOCAL", "T2"], 1000, 0, state)
+    assert scheduler._check_capacity(["T1", "B1", "DIRECT", "B1", "T2"], 1000, 0, state)
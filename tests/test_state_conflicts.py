@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+State.get_conflicts 的测试
+与两两比较占用记录的参考实现在随机占用计划上比较结果
+"""
+import random
+
+from data_class import Tank, Pipeline
+from state import State
+
+
+def _reference_pipeline_conflicts(pipe_id, schedule):
+    """参考实现：两两比较占用记录，按 (i, j) 顺序输出"""
+    conflicts = []
+    for i in range(len(schedule)):
+        for j in range(i + 1, len(schedule)):
+            start1, end1 = schedule[i][0], schedule[i][1]
+            start2, end2 = schedule[j][0], schedule[j][1]
+            if not (end1 <= start2 or start1 >= end2):
+                conflicts.append({
+                    'type': 'pipeline_time_conflict',
+                    'resource_id': pipe_id,
+                    'schedule1': schedule[i],
+                    'schedule2': schedule[j]
+                })
+    return conflicts
+
+
+def _random_schedule(rng):
+    schedule = []
+    for k in range(rng.randint(0, 15)):
+        start = rng.randint(0, 60)
+        # 包含零长度和结束早于开始的占用
+        schedule.append((start, start + rng.randint(-5, 20), "oilA", float(k)))
+    return schedule
+
+
+def test_pipeline_conflicts_match_pairwise_reference():
+    rng = random.Random(0)
+    for _ in range(500):
+        pipelines = [Pipeline(pipe_id=f"P{i}") for i in range(3)]
+        state = State([], pipelines, [])
+        expected = []
+        for pipe_id, pipeline in state.pipelines.items():
+            # 整体赋值未排序的原始计划，赋值时按开始时间排序并重建索引
+            pipeline.occupancy_schedule = _random_schedule(rng)
+            expected.extend(_reference_pipeline_conflicts(pipe_id, pipeline.occupancy_schedule))
+        assert state.get_conflicts() == expected
+
+
+def test_low_inventory_reported_before_pipeline_conflicts():
+    state = State(
+        [Tank(tank_id="T1", site_id="S1", inventory=5, min_safe_level=10),
+         Tank(tank_id="T2", site_id="S1", inventory=50, min_safe_level=10)],
+        [Pipeline(pipe_id="P1", occupancy_schedule=[(0, 10, "oilA", 1.0), (5, 15, "oilA", 1.0)])],
+        []
+    )
+    conflicts = state.get_conflicts()
+
+    assert [c['type'] for c in conflicts] == ['tank_inventory_low', 'pipeline_time_conflict']
+    assert conflicts[0]['resource_id'] == "T1"
+    assert conflicts[1]['resource_id'] == "P1"
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+State 写时复制派生的测试
+派生状态的修改不应影响原状态，反之亦然
+"""
+from data_class import Tank, Pipeline
+from state import State
+
+
+def _build_state():
+    tanks = [
+        Tank(tank_id="T1", site_id="S1", oil_type="oilA", inventory=300, safe_tank_capacity=500,
+             safe_tank_level=1.0, tank_type=["SOURCE"]),
+        Tank(tank_id="T2", site_id="S2", oil_type="oilA", inventory=100, safe_tank_capacity=500,
+             safe_tank_level=1.0, tank_type=["TARGET"]),
+        Tank(tank_id="T3", site_id="S2", oil_type="oilB", inventory=50, safe_tank_capacity=500,
+             safe_tank_level=1.0, tank_type=["TARGET"]),
+    ]
+    return State(tanks, [Pipeline(pipe_id="P1")], [])
+
+
+def test_apply_dispatch_order_leaves_parent_unchanged():
+    parent = _build_state()
+    parent.tank_arrays()
+    child = parent.apply_dispatch_order({
+        'source_tank_id': "T1", 'target_tank_id': "T2", 'required_volume': 50, 'oil_type': "oilB",
+    })
+
+    assert (parent.tanks["T1"].inventory, parent.tanks["T2"].inventory) == (300, 100)
+    assert (child.tanks["T1"].inventory, child.tanks["T2"].inventory) == (250, 150)
+    assert parent.tanks["T1"].oil_type == "oilA"
+    assert child.tanks["T1"].oil_type == "oilB"
+    # 未修改的油罐继续共享
+    assert child.tanks["T3"] is parent.tanks["T3"]
+    assert list(parent.tank_arrays().inventory) == [300, 100, 50]
+    assert list(child.tank_arrays().inventory) == [250, 150, 50]
+    assert (parent.oil_switch_count, child.oil_switch_count) == (0, 1)
+    assert (parent.total_dispatch_orders, child.total_dispatch_orders) == (0, 1)
+
+
+def test_parent_changes_after_fork_do_not_leak():
+    parent = _build_state()
+    child = parent.fork()
+    parent.own_tank("T1").inventory = 10
+    parent.own_pipeline("P1").add_occupancy((0, 10, "oilA", 1.0))
+
+    assert child.tanks["T1"].inventory == 300
+    assert not child.pipelines["P1"].occupancy_schedule
+
+
+def test_constraints_are_independent_after_fork():
+    parent = _build_state()
+    parent.constraints['max_oil_switches'] = 3
+    child = parent.fork()
+    child.constraints['max_oil_switches'] = 5
+    parent.constraints['min_batch_volume'] = 10
+
+    assert parent.constraints['max_oil_switches'] == 3
+    assert child.constraints['max_oil_switches'] == 5
+    assert 'min_batch_volume' not in child.constraints
+
+
+def test_materialize_keeps_contents_and_sharing():
+    parent = _build_state()
+    child = parent.apply_dispatch_order({
+        'source_tank_id': "T1", 'target_tank_id': "T2", 'required_volume': 50, 'oil_type': "oilA",
+    })
+    child.materialize()
+
+    assert type(child.tanks) is dict
+    assert child.tanks["T1"].inventory == 250
+    assert parent.tanks["T1"].inventory == 300
+    grandchild = child.fork()
+    grandchild.own_tank("T2").inventory = 0
+    assert child.tanks["T2"].inventory == 150
+
+
+def test_tank_arrays_are_shared_until_a_tank_is_owned():
+    parent = _build_state()
+    arrays = parent.tank_arrays()
+    child = parent.fork()
+
+    assert child.tank_arrays() is arrays
+    child.own_tank("T1").inventory = 0
+    child.refresh_tank_arrays(["T1"])
+
+    assert child.tank_arrays() is not arrays
+    assert parent.tank_arrays() is arrays
+    assert list(arrays.inventory) == [300, 100, 50]
+    assert list(child.tank_arrays().inventory) == [0, 100, 50]
+
+    # 当前状态在派生之后修改油罐，同样不影响派生状态
+    parent.own_tank("T2").inventory = 0
+    parent.refresh_tank_arrays(["T2"])
+    assert list(parent.tank_arrays().inventory) == [300, 0, 50]
+    assert list(child.tank_arrays().inventory) == [0, 100, 50]
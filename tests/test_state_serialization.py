@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+State 序列化与反序列化的测试
+serialize_bytes 的编码结果需与 serialize_state 一致，反序列化后应能还原状态
+"""
+import json
+from datetime import datetime
+
+import pytest
+
+import state as state_module
+from data_class import Tank, Pipeline, Branch
+from state import State
+
+
+def _build_state():
+    tanks = [
+        Tank(tank_id="T1", site_id="S1", oil_type="oilA", inventory=300, current_level=0.6,
+             safe_tank_capacity=500, safe_tank_level=0.9, tank_type=["SOURCE"]),
+        Tank(tank_id="T2", site_id="S2", oil_type=None, inventory=100, safe_tank_capacity=400,
+             tank_type=["TARGET"]),
+    ]
+    pipelines = [Pipeline(pipe_id="P1", pipe_capacity_per_meter=1.5,
+                          pipe_shutdown_start_time=datetime(2024, 1, 3, 8, 0),
+                          pipe_shutdown_end_time=datetime(2024, 1, 3, 12, 30, 15, 250000))]
+    branches = [Branch(branch_id="B1", from_id="T1", to_id="S1")]
+    state = State(tanks, pipelines, branches)
+    state.current_time = datetime(2024, 1, 1, 6, 0)
+    state.constraints['max_oil_switches'] = 3
+    state.own_tank("T1").occupied_until = datetime(2024, 1, 2, 9, 15)
+    state.own_pipeline("P1").add_occupancy((
+        datetime(2024, 1, 1, 8, 0), datetime(2024, 1, 1, 10, 0, 0, 500),
+        "oilA", 100.0, "T1", "T2", "D1"
+    ))
+    return state
+
+
+@pytest.fixture(params=["default", "json"])
+def encoder(request, monkeypatch):
+    """分别使用已安装的编码器和标准库 json 回退路径"""
+    if request.param == "json":
+        monkeypatch.setattr(state_module, "msgspec", None)
+        monkeypatch.setattr(state_module, "orjson", None)
+    return request.param
+
+
+def test_serialize_bytes_matches_serialize_state(encoder):
+    state = _build_state()
+    # 经过 JSON 编解码后比较，元组与列表视为相同
+    assert json.loads(state.serialize_bytes()) == json.loads(json.dumps(state.serialize_state()))
+
+
+def test_deserialize_restores_serialized_state():
+    original = _build_state()
+    original = original.apply_dispatch_order({
+        'source_tank_id': "T1", 'target_tank_id': "T2", 'required_volume': 50, 'oil_type': "oilB",
+    })
+    payload = json.loads(original.serialize_bytes())
+
+    restored = State(
+        [Tank(tank_id="T1", site_id="S1", safe_tank_capacity=500, safe_tank_level=0.9, tank_type=["SOURCE"]),
+         Tank(tank_id="T2", site_id="S2", safe_tank_capacity=400, tank_type=["TARGET"])],
+        [Pipeline(pipe_id="P1", pipe_capacity_per_meter=1.5,
+                  pipe_shutdown_start_time=datetime(2024, 1, 3, 8, 0),
+                  pipe_shutdown_end_time=datetime(2024, 1, 3, 12, 30, 15, 250000))],
+        [Branch(branch_id="B1", from_id="T1", to_id="S1")]
+    ).deserialize_state(payload)
+
+    assert restored.serialize_state() == original.serialize_state()
+    assert restored.pipelines["P1"].has_time_conflict(datetime(2024, 1, 1, 9, 0), datetime(2024, 1, 1, 11, 0))
+
+
+def test_parse_iso_accepts_utc_suffix_and_caches():
+    state_module._parse_iso.cache_clear()
+    first = state_module._parse_iso("2024-01-01T08:00:00Z")
+    second = state_module._parse_iso("2024-01-01T08:00:00Z")
+
+    assert first == datetime.fromisoformat("2024-01-01T08:00:00+00:00")
+    assert second is first
+    assert state_module._parse_iso.cache_info().hits == 1
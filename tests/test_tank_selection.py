@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+源/目标油罐选择的测试
+向量化的 _find_best_*_tank 与逐个油罐评分的参考实现在随机油罐上比较结果
+"""
+import random
+
+from data_class import Tank, DispatchOrder
+from scheduler import Scheduler
+from state import State
+
+
+def _reference_source_tank(order, state):
+    """参考实现：逐个油罐筛选和评分，同分取第一个"""
+    best_tank_id, best_score = None, -float('inf')
+    for tank_id, tank in state.tanks.items():
+        if "SOURCE" not in tank.tank_type or tank.status != "AVAILABLE":
+            continue
+        if tank.oil_type != order.oil_type and tank.oil_type is not None:
+            continue
+        if tank.inventory - tank.min_safe_level < order.required_volume:
+            continue
+        score = 0
+        if tank.oil_type == order.oil_type:
+            score += 100
+        elif tank.oil_type is None:
+            score += 50
+        else:
+            score -= 20
+        if tank.safe_tank_capacity > 0:
+            score += (tank.inventory / tank.safe_tank_capacity) * 30
+        if tank.current_level <= tank.safe_tank_level:
+            score -= 50
+        elif tank.current_level <= tank.safe_tank_level * 0.3:
+            score -= 30
+        if score > best_score:
+            best_tank_id, best_score = tank_id, score
+    return best_tank_id
+
+
+def _reference_target_tank(order, state):
+    """参考实现：在目标站点内逐个油罐筛选和评分，同分取第一个"""
+    best_tank_id, best_score = None, -float('inf')
+    for tank_id, tank in state.tanks.items():
+        if tank.site_id != order.site_id or tank.status != "AVAILABLE":
+            continue
+        if tank.oil_type != order.oil_type and tank.oil_type is not None:
+            continue
+        if tank.safe_tank_capacity - tank.inventory < order.required_volume:
+            continue
+        score = 0
+        if tank.oil_type == order.oil_type:
+            score += 100
+        elif tank.oil_type is None:
+            score += 50
+        else:
+            score -= 20
+        if tank.safe_tank_capacity > 0:
+            score += min((tank.inventory + order.required_volume) / tank.safe_tank_capacity, 1.0) * 30
+            target_level = (tank.current_level * tank.safe_tank_capacity
+                            + order.required_volume) / tank.safe_tank_capacity
+            if target_level >= tank.safe_tank_level * 0.9:
+                score -= 50
+            elif target_level >= tank.safe_tank_level * 0.8:
+                score -= 20
+        if score > best_score:
+            best_tank_id, best_score = tank_id, score
+    return best_tank_id
+
+
+def _random_tanks(rng, n):
+    tanks = []
+    for i in range(n):
+        capacity = rng.choice([0, 100, 200, 400])
+        tanks.append(Tank(
+            tank_id=f"T{i}",
+            site_id=rng.choice(["S0", "S1", "S2"]),
+            oil_type=rng.choice(["oilA", "oilB", None]),
+            inventory=rng.randint(0, 400),
+            current_level=rng.randint(0, 10) / 10,
+            safe_tank_capacity=capacity,
+            safe_tank_level=rng.randint(0, 10) / 10,
+            min_safe_level=rng.randint(0, 50),
+            tank_type=rng.sample(["SOURCE", "TARGET", "MIDDLE"], rng.randint(0, 3)),
+            status=rng.choice(["AVAILABLE", "AVAILABLE", "MAINTENANCE"]),
+        ))
+    return tanks
+
+
+def _random_order(rng):
+    return DispatchOrder(dispatch_order_id="D1", site_id=rng.choice(["S0", "S1", "S2", "S9"]),
+                         oil_type=rng.choice(["oilA", "oilB"]), required_volume=rng.randint(0, 200))
+
+
+def test_tank_selection_matches_reference():
+    rng = random.Random(0)
+    scheduler = Scheduler()
+    for _ in range(300):
+        state = State(_random_tanks(rng, rng.randint(1, 12)), [], [])
+        for _ in range(10):
+            order = _random_order(rng)
+            assert scheduler._find_best_source_tank(order, state) == _reference_source_tank(order, state)
+            assert scheduler._find_best_target_tank(order, state) == _reference_target_tank(order, state)
+
+
+def test_tank_selection_follows_applied_orders():
+    rng = random.Random(1)
+    scheduler = Scheduler()
+    for _ in range(100):
+        state = State(_random_tanks(rng, 8), [], [])
+        state.tank_arrays()  # 先建好列式数据，检验派生状态的增量刷新
+        tank_ids = list(state.tanks)
+        for _ in range(5):
+            state = state.apply_dispatch_order({
+                'source_tank_id': rng.choice(tank_ids),
+                'target_tank_id': rng.choice(tank_ids),
+                'required_volume': rng.randint(0, 100),
+                'oil_type': rng.choice(["oilA", "oilB"]),
+            })
+            order = _random_order(rng)
+            assert scheduler._find_best_source_tank(order, state) == _reference_source_tank(order, state)
+            assert scheduler._find_best_target_tank(order, state) == _reference_target_tank(order, state)
+
+
+def test_tank_with_null_numbers_is_skipped():
+    tanks = [
+        Tank(tank_id="T1", site_id="S1", oil_type="oilA", inventory=None, safe_tank_capacity=500,
+             tank_type=["SOURCE", "TARGET"]),
+        Tank(tank_id="T2", site_id="S1", oil_type="oilA", inventory=300, safe_tank_capacity=500,
+             safe_tank_level=1.0, tank_type=["SOURCE", "TARGET"]),
+    ]
+    state = State(tanks, [], [])
+    order = DispatchOrder(dispatch_order_id="D1", site_id="S1", oil_type="oilA", required_volume=50)
+
+    scheduler = Scheduler()
+    assert scheduler._find_best_source_tank(order, state) == "T2"
+    assert scheduler._find_best_target_tank(order, state) == "T2"
+    assert state.get_available_tanks_for_oil_type("oilA", 10) == ["T2"]
+    assert state.calculate_resource_utilization() == 0.3
+
+
+def test_non_string_ids_are_kept_as_is():
+    tanks = [Tank(tank_id=1, site_id=10, oil_type="oilA", inventory=100, safe_tank_capacity=500,
+                  safe_tank_level=1.0, tank_type=["TARGET"])]
+    state = State(tanks, [], [])
+    order = DispatchOrder(dispatch_order_id="D1", site_id=10, oil_type="oilA", required_volume=50)
+
+    assert list(state.tanks) == [1]
+    assert state.tanks[1].site_id == 10
+    assert Scheduler()._find_best_target_tank(order, state) == 1
+
+
+def test_reserved_tank_is_no_longer_selected():
+    tanks = [
+        Tank(tank_id="T1", site_id="S1", oil_type="oilA", inventory=400, safe_tank_capacity=500,
+             safe_tank_level=1.0, tank_type=["SOURCE"]),
+        Tank(tank_id="T2", site_id="S1", oil_type="oilA", inventory=200, safe_tank_capacity=500,
+             safe_tank_level=1.0, tank_type=["SOURCE"]),
+    ]
+    state = State(tanks, [], [])
+    order = DispatchOrder(dispatch_order_id="D1", site_id="S1", oil_type="oilA", required_volume=50)
+    scheduler = Scheduler()
+    assert scheduler._find_best_source_tank(order, state) == "T1"
+
+    forked = state.fork()
+    forked.reserve_tank("T1", 100)
+    assert forked.tanks["T1"].inventory == 300
+    assert scheduler._find_best_source_tank(order, forked) == "T2"
+    assert scheduler._find_best_source_tank(order, forked) == _reference_source_tank(order, forked)
+    # 原状态不受影响
+    assert scheduler._find_best_source_tank(order, state) == "T1"
+
+    forked.release_tank("T1")
+    assert scheduler._find_best_source_tank(order, forked) == "T1"
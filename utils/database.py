@@ -1,17 +1,32 @@
+import os
 import yaml
+from functools import lru_cache
 from typing import Dict, Any, Type, List
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, select
 from sqlalchemy.orm import sessionmaker
+import data_class
 from data_class import DispatchOrder
 from models import OilDB, TankDB, PipelineDB, BranchDB, CustomerDB, CustomerOrderDB, SiteDB, DispatchOrderDB
 
-def load_config(config_path='config.yaml'):
+# 有 libyaml 时使用 C 实现的安全加载器
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 
-    """加载配置文件"""
+@lru_cache(maxsize=8)
+def _load_config_cached(config_path, mtime_ns):
+
+    """按 (路径, 修改时间) 缓存的配置解析"""
 
     with open(config_path, 'r', encoding='utf-8') as f:
 
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=_YamlLoader)
+
+
+def load_config(config_path='config.yaml'):
+
+    """加载配置文件（文件未修改时直接返回缓存结果，返回的字典请勿修改）"""
+
+    return _load_config_cached(config_path, os.stat(config_path).st_mtime_ns)
 
 
 def get_database_url(db_config, include_db=True):
@@ -28,7 +43,32 @@ def get_database_url(db_config, include_db=True):
 
         return base
 
+@lru_cache(maxsize=4)
+def _get_engine(db_url: str, echo: bool = False, pool_size: int = 5):
+    """按连接参数缓存引擎，多次加载复用同一个连接池"""
+    return create_engine(
+        db_url,
+        echo=echo,
+        pool_size=pool_size,
+        pool_pre_ping=True
+    )
+
+
+@lru_cache(maxsize=4)
+def _get_session_factory(db_url: str, echo: bool = False, pool_size: int = 5):
+    """按连接参数缓存会话工厂"""
+    return sessionmaker(bind=_get_engine(db_url, echo, pool_size))
+
+
+def _create_session():
+    """按配置文件创建数据库会话"""
+    db_cfg = load_config()['database']
+    db_url = get_database_url(db_cfg, include_db=True)
+    SessionLocal = _get_session_factory(db_url, db_cfg.get('echo', False), db_cfg.get('pool_size', 5))
+    return SessionLocal()
+
 def table_2_dict_by_pk(model_class, rows):
+    """按主键把查询结果转为字典，rows 为列名到值的映射（如 Result.mappings()）"""
     # {
     # 1: {  # tank_id 为 1 的记录
     #     'name': 'Main Tank',
@@ -46,20 +86,12 @@ def table_2_dict_by_pk(model_class, rows):
     mapper = inspect(model_class)
     pk_column = mapper.primary_key[0]  # 获取第一个主键列（假设单主键）
     pk_name = pk_column.name
+    # 非主键列名只计算一次
+    columns_except_pk = tuple(column.name for column in mapper.columns if column.name != pk_name)
 
     result = {}
-    for row in rows: 
-        # 获取主键值
-        pk_value = getattr(row, pk_name)
-        # 获取所有列名
-        columns = [column.name for column in mapper.columns]
-        # 构建行数据（排除主键）
-        row_data = {
-            col: getattr(row, col)
-            for col in columns
-            if col != pk_name
-        }
-        result[pk_value] = row_data
+    for row in rows:
+        result[row[pk_name]] = {col: row[col] for col in columns_except_pk}
 
     return result
 
@@ -88,27 +120,13 @@ def load_table_data(table_name: str):
     # 获取对应的模型类
     model_class = model_map[table_name]
     
-    # 加载配置
-    config = load_config()
-    db_cfg = config['database']
-    
-    # 创建数据库连接
-    db_url = get_database_url(db_cfg, include_db=True)
-    engine = create_engine(
-        db_url,
-        echo=db_cfg.get('echo', False),
-        pool_size=db_cfg.get('pool_size', 5),
-        pool_pre_ping=True
-    )
-    
-    # 创建会话
-    SessionLocal = sessionmaker(bind=engine)
-    session = SessionLocal()
+    # 创建会话（复用缓存的引擎和连接池）
+    session = _create_session()
     
     try:
-        # 使用模型类进行查询
-        table = session.query(model_class).all()
-        result = table_2_dict_by_pk(model_class, table)
+        # 按表查询（Core），行以列名映射的形式交给 table_2_dict_by_pk
+        rows = session.execute(select(model_class.__table__)).mappings()
+        result = table_2_dict_by_pk(model_class, rows)
         # session.expunge_all()
         
         # # 根据模型类型构建结果字典
@@ -145,19 +163,6 @@ def load_table_as_objects(table_name: str) -> List[Any]:
     Returns:
         List[Any]: 业务对象列表
     """
-    # 加载配置
-    config = load_config()
-    db_cfg = config['database']
-    
-    # 创建数据库连接
-    db_url = get_database_url(db_cfg, include_db=True)
-    engine = create_engine(
-        db_url,
-        echo=db_cfg.get('echo', False),
-        pool_size=db_cfg.get('pool_size', 5),
-        pool_pre_ping=True
-    )
-    
     # 模型类映射
     model_map = {
         "Tank": TankDB,
@@ -174,17 +179,17 @@ def load_table_as_objects(table_name: str) -> List[Any]:
         raise ValueError(f"不支持的表名: {table_name}. 支持的表: {list(model_map.keys())}")
     
     model_class = model_map[table_name]
+    business_class = getattr(data_class, model_class.__business_class__)  # 与 to_object 共用模型上的声明
+    columns = model_class.__business_columns__
     
-    # 创建会话
-    SessionLocal = sessionmaker(bind=engine)
-    session = SessionLocal()
+    # 创建会话（复用缓存的引擎和连接池）
+    session = _create_session()
     
     try:
-        # 查询所有记录
-        db_objects = session.query(model_class).all()
-        
-        # 转换为业务对象
-        business_objects = [obj.to_object() for obj in db_objects]
+        # 只查询业务字段并分批读取，行直接构造业务对象，不生成 ORM 实例
+        stmt = select(*(getattr(model_class, name) for name in columns)).execution_options(yield_per=2000)
+        result = session.execute(stmt)
+        business_objects = [business_class(**dict(zip(columns, row))) for row in result]
         return business_objects
     
     finally: